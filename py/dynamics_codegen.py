@@ -0,0 +1,379 @@
+"""動力学の閉形式コード生成
+
+BaxterDynamicsのパラメータ表からM(q), C(q, dq) dq, G(q)を計算するpythonの
+モジュールを作る（rmp_fromGDS_attract_xi_M.pyと同じく生成したコード）．
+NewtonEulerDynamicsの再帰（CRBA, RNEA）をsympyで記号的にたどり，
+段ごとに共通部分式を除去（sympy.cse）して中間変数に置いていくので，
+式が膨らまずに直線的な四則演算のコードになる．
+
+生成したモジュールはパラメータのハッシュを名前に入れてキャッシュディレクトリに
+書き出し，次からはそれをimportするだけにする．
+"""
+
+import numpy as np
+import sympy as sp
+import hashlib
+import importlib.util
+import os
+import time
+
+from lagrange import BaxterDynamics
+from newton_euler import NewtonEulerDynamics
+
+
+GENERATOR_VERSION = 1  # 生成するコードを変えたら上げる
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '_generated'
+)  # 生成したモジュールの置き場所
+
+
+def param_hash(model):
+    """動力学パラメータのハッシュ（16文字）"""
+
+    tables = [GENERATOR_VERSION, model.n]
+    for name in (
+        'alpha', 'a', 'd', 'm', 'x_bar', 'y_bar', 'z_bar',
+        'Ixx', 'Iyy', 'Izz', 'Ixy', 'Iyz', 'Ixz', 'g',
+    ):
+        tables.append([float(x) for x in np.ravel(getattr(model, name))])
+
+    return hashlib.sha256(repr(tables).encode()).hexdigest()[:16]
+
+
+class _Tape:
+    """記号計算の途中結果を中間変数に置いていく"""
+
+    def __init__(self,):
+        self.lines = []  # (変数, 式)
+        self.symbols = sp.numbered_symbols('x')
+        return
+
+
+    def put(self, exprs):
+        """式のリストに共通部分式除去をかけて，定数と記号以外を中間変数にする"""
+
+        replacements, reduced = sp.cse(exprs, symbols=self.symbols)
+        self.lines.extend(replacements)
+
+        z = []
+        for e in reduced:
+            if e.is_Atom:
+                z.append(e)
+            else:
+                x = next(self.symbols)
+                self.lines.append((x, e))
+                z.append(x)
+
+        return z
+
+
+def _const(x, tol=1e-12):
+    """数値定数（丸め誤差程度の値は0）"""
+    x = float(x)
+    return sp.Integer(0) if abs(x) < tol else sp.Float(x, 17)
+
+
+def _matvec(A, v):
+    """定数行列 (6,6) と記号のベクトルの積"""
+    return [sum(A[i][j] * v[j] for j in range(6) if A[i][j] != 0) for i in range(6)]
+
+
+def _rot(c, s, v):
+    """Rz(q)の座標変換をかける（c = cos(q), s = sin(q)）"""
+    return [
+        c*v[0] + s*v[1], -s*v[0] + c*v[1], v[2],
+        c*v[3] + s*v[4], -s*v[3] + c*v[4], v[5],
+    ]
+
+
+def _rot_T(c, s, v):
+    """Rz(q)の座標変換の転置をかける"""
+    return _rot(c, -s, v)
+
+
+def _cross_motion(v, m):
+    """v×m（運動ベクトル）"""
+    w, u = v[0:3], v[3:6]
+    return _cross(w, m[0:3]) + [a + b for a, b in zip(_cross(w, m[3:6]), _cross(u, m[0:3]))]
+
+
+def _cross_force(v, f):
+    """v×*f（力ベクトル）"""
+    w, u = v[0:3], v[3:6]
+    return [a + b for a, b in zip(_cross(w, f[0:3]), _cross(u, f[3:6]))] + _cross(w, f[3:6])
+
+
+def _cross(a, b):
+    return [
+        a[1]*b[2] - a[2]*b[1],
+        a[2]*b[0] - a[0]*b[2],
+        a[0]*b[1] - a[1]*b[0],
+    ]
+
+
+class _SymbolicNewtonEuler:
+    """NewtonEulerDynamicsの再帰を記号的にたどる"""
+
+    def __init__(self, ne, tape):
+        self.ne = ne
+        self.tape = tape
+        self.n = ne.n
+        self.X_tree = [[[_const(x) for x in row] for row in X] for X in ne.X_tree]
+        self.X_tree_T = [[list(col) for col in zip(*X)] for X in self.X_tree]
+        self.I = [[[_const(x) for x in row] for row in I] for I in ne.I]
+        self.c = sp.symbols('c0:%d' % self.n)
+        self.s = sp.symbols('s0:%d' % self.n)
+        return
+
+
+    def up(self, i, v):
+        """親の座標系のベクトルをi'座標系へ"""
+        return _rot(self.c[i], self.s[i], _matvec(self.X_tree[i], v))
+
+
+    def down(self, i, f):
+        """i'座標系の力ベクトルを親の座標系へ（X^T f）"""
+        return _matvec(self.X_tree_T[i], _rot_T(self.c[i], self.s[i], f))
+
+
+    def rnea(self, dq, gravity):
+        """ddq = 0 のRNEA（dqがNoneなら速度0）"""
+
+        put = self.tape.put
+        zero = [sp.Integer(0)] * 6
+        v = zero
+        a = [_const(x) for x in self.ne.a_base] if gravity else zero
+        f = []
+        for i in range(self.n):
+            if dq is None:
+                a = put(self.up(i, a))
+                f.append(put(_matvec(self.I[i], a)))
+            else:
+                vJ = [0, 0, dq[i], 0, 0, 0]
+                v = put([x + y for x, y in zip(self.up(i, v), vJ)])
+                a = put([x + y for x, y in zip(self.up(i, a), _cross_motion(v, vJ))])
+                Iv = put(_matvec(self.I[i], v))
+                f.append(put([
+                    x + y for x, y in zip(_matvec(self.I[i], a), _cross_force(v, Iv))
+                ]))
+
+        tau = [None] * self.n
+        for i in reversed(range(self.n)):
+            tau[i] = f[i][2]
+            if i > 0:
+                f[i-1] = put([x + y for x, y in zip(f[i-1], self.down(i, f[i]))])
+
+        return tau
+
+
+    def crba(self,):
+        """慣性行列の下三角"""
+
+        put = self.tape.put
+        Ic = [[list(row) for row in I] for I in self.I]
+        for i in reversed(range(1, self.n)):
+            # X^T Ic X を列ごとに
+            cols = []
+            for k in range(6):
+                e = [sp.Integer(1) if j == k else sp.Integer(0) for j in range(6)]
+                Xe = self.up(i, e)
+                cols.append(self.down(i, [
+                    sum(Ic[i][r][j] * Xe[j] for j in range(6)) for r in range(6)
+                ]))
+            new = [[Ic[i-1][r][k] + cols[k][r] for k in range(6)] for r in range(6)]
+            flat = put([new[r][k] for r in range(6) for k in range(r+1)])
+            it = iter(flat)
+            for r in range(6):
+                for k in range(r+1):
+                    Ic[i-1][r][k] = Ic[i-1][k][r] = next(it)
+
+        M = [[None] * self.n for _ in range(self.n)]
+        for i in range(self.n):
+            F = [Ic[i][r][2] for r in range(6)]
+            M[i][i] = F[2]
+            for j in reversed(range(i)):
+                F = put(self.down(j+1, F))
+                M[i][j] = M[j][i] = F[2]
+
+        return M
+
+
+def _emit_function(name, args, doc, tape, n, outputs, shape):
+    """1つの関数のソースを作る"""
+
+    lines = ['def %s(%s):' % (name, ', '.join(args)), '    """%s"""' % doc]
+    lines.append('    %s = np.ravel(q)' % ', '.join('q%d' % i for i in range(n)))
+    if 'dq' in args:
+        lines.append('    %s = np.ravel(dq)' % ', '.join('dq%d' % i for i in range(n)))
+    for i in range(n):
+        lines.append('    c%d = cos(q%d)' % (i, i))
+        lines.append('    s%d = sin(q%d)' % (i, i))
+    for x, e in tape.lines:
+        lines.append('    %s = %s' % (x, sp.pycode(e, fully_qualified_modules=False)))
+
+    rows = [
+        '        [' + ', '.join(sp.pycode(e) for e in row) + '],'
+        for row in outputs
+    ]
+    lines.append('    return np.array([')
+    lines.extend(rows)
+    lines.append('    ]).reshape(%s)' % (shape,))
+
+    return '\n'.join(lines)
+
+
+def generate_source(model=None):
+    """M, Cdq, Gを計算するモジュールのソースを作る"""
+
+    if model is None:
+        model = BaxterDynamics()
+    ne = NewtonEulerDynamics(model)
+    n = ne.n
+    dq = sp.symbols('dq0:%d' % n)
+
+    functions = []
+
+    tape = _Tape()
+    M = _SymbolicNewtonEuler(ne, tape).crba()
+    functions.append(_emit_function(
+        'M', ['q'], '慣性行列 (%d, %d)' % (n, n), tape, n, M, (n, n)
+    ))
+
+    tape = _Tape()
+    C = _SymbolicNewtonEuler(ne, tape).rnea(dq, gravity=False)
+    functions.append(_emit_function(
+        'Cdq', ['q', 'dq'], 'コリオリ・遠心力項 C(q, dq) dq (%d, 1)' % n,
+        tape, n, [C], (n, 1)
+    ))
+
+    tape = _Tape()
+    G = _SymbolicNewtonEuler(ne, tape).rnea(None, gravity=True)
+    functions.append(_emit_function(
+        'G', ['q'], '重力項 (%d, 1)' % n, tape, n, [G], (n, 1)
+    ))
+
+    h = param_hash(model)
+    header = '\n'.join([
+        '"""動力学の閉形式（dynamics_codegen.pyで自動生成．編集しないこと）',
+        '',
+        'パラメータのハッシュ : %s' % h,
+        '"""',
+        'import numpy as np',
+        'from math import sin, cos',
+        '',
+        'PARAM_HASH = %r' % h,
+    ])
+
+    return header + '\n\n\n' + '\n\n\n'.join(functions) + '\n'
+
+
+def load_generated_dynamics(model=None, cache_dir=None):
+    """生成したモジュールをimportする（なければ作ってキャッシュに保存）
+
+    model : BaxterDynamics（パラメータ表）．NoneならBaxterDynamics()
+    cache_dir : キャッシュディレクトリ．NoneならDEFAULT_CACHE_DIR
+    戻り値 : M(q), Cdq(q, dq), G(q)を持つモジュール
+    """
+
+    if model is None:
+        model = BaxterDynamics()
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+
+    name = 'dynamics_%s' % param_hash(model)
+    path = os.path.join(cache_dir, name + '.py')
+
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        source = generate_source(model)
+        tmp = path + '.%d.tmp' % os.getpid()
+        with open(tmp, 'w', encoding='UTF-8') as file:
+            file.write(source)
+        os.replace(tmp, path)  # 途中で読まれないように最後に置き換える
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+class GeneratedDynamics:
+    """生成したコードによる動力学（BaxterDynamicsと同じM, C, G, calc_torque）"""
+
+    def __init__(self, model=None, cache_dir=None):
+        """
+
+        model : BaxterDynamics（パラメータ表）．NoneならBaxterDynamics()
+        cache_dir : キャッシュディレクトリ．NoneならDEFAULT_CACHE_DIR
+        """
+
+        self.module = load_generated_dynamics(model, cache_dir)
+        self.M = self.module.M
+        self.Cdq = self.module.Cdq
+        self.G = self.module.G
+
+        return
+
+
+    def C(self, q, dq):
+        """コリオリ・遠心力項 (7,1)"""
+        return self.Cdq(q, dq)
+
+
+    def calc_torque(self, q, dq, ddq):
+        """トルクを計算"""
+        return self.M(q) @ np.reshape(ddq, (-1, 1)) + self.Cdq(q, dq) + self.G(q)
+
+
+    def calc_real_ddq(self, u, F, q, dq):
+        """現実世界での加速度（BaxterDynamics.calc_real_ddqと同じ引数）"""
+        return np.linalg.solve(
+            self.M(q), u + F - (self.Cdq(q, dq) + self.G(q))
+        )
+
+
+
+def _test():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.time()
+        gen = GeneratedDynamics(cache_dir=cache_dir)
+        print("生成時間 ", time.time() - start)
+
+        start = time.time()
+        gen = GeneratedDynamics(cache_dir=cache_dir)
+        print("キャッシュからの読み込み時間 ", time.time() - start)
+
+    ne = NewtonEulerDynamics()
+    rng = np.random.default_rng(0)
+    err = 0
+    for _ in range(5):
+        q = rng.uniform(-np.pi, np.pi, (7, 1))
+        dq = rng.normal(size=(7, 1))
+        ddq = rng.normal(size=(7, 1))
+        err = max(
+            err,
+            np.abs(gen.M(q) - ne.M(q)).max(),
+            np.abs(gen.Cdq(q, dq) - ne.C(q, dq)).max(),
+            np.abs(gen.G(q) - ne.G(q)).max(),
+            np.abs(gen.calc_torque(q, dq, ddq) - ne.calc_torque(q, dq, ddq)).max(),
+        )
+    print("ニュートン・オイラー法との差 ", err)
+    assert err < 1e-10
+
+    for name, f, args in (
+        ("M", gen.M, (q,)), ("Cdq", gen.Cdq, (q, dq)), ("G", gen.G, (q,)),
+    ):
+        start = time.time()
+        for _ in range(1000):
+            f(*args)
+        print(name, "の計算時間 ", (time.time() - start) / 1000)
+
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -9,7 +9,7 @@ from math import cos, sin, tan, pi
 import matplotlib.pyplot as plt
 
 
-from kinematics import BaxterRobotArmKinematics
+from kinematics import BaxterDualArmKinematics
 
 
 def _rotate(alpha, beta, gamma):
@@ -213,21 +213,10 @@ def _test(data):
     goal = np.array([[0.0, -0.5, 1]]).T
 
 
-    right = BaxterRobotArmKinematics(isLeft=False)
-    os_r = right.get_joint_positions()
-    xrs, yrs, zrs = [], [], []
-    for o in os_r:
-        xrs.append(o[0, 0])
-        yrs.append(o[1, 0])
-        zrs.append(o[2, 0])
-
-    left = BaxterRobotArmKinematics(isLeft=True)
-    os_l = left.get_joint_positions()
-    xls, yls, zls = [], [], []
-    for o in os_l:
-        xls.append(o[0, 0])
-        yls.append(o[1, 0])
-        zls.append(o[2, 0])
+    arms = BaxterDualArmKinematics()
+    arm_data = arms.data  # 左，右の順
+    xls, yls, zls = arm_data.joint_positions[0].T
+    xrs, yrs, zrs = arm_data.joint_positions[1].T
 
 
 
@@ -243,18 +232,12 @@ def _test(data):
 
 
     cs_name = ("1", "2", "3", "4", "5", "6", "7", "GL")
-    for i, cs in enumerate(right.cpoints_x):
-        cs_ = np.concatenate(cs, axis=1)
-        xs = cs_[0, :].tolist()
-        ys = cs_[1, :].tolist()
-        zs = cs_[2, :].tolist()
-        ax.scatter(xs, ys, zs, label = "R-" + cs_name[i])
-    for i, cs in enumerate(left.cpoints_x):
-        cs_ = np.concatenate(cs, axis=1)
-        xs = cs_[0, :].tolist()
-        ys = cs_[1, :].tolist()
-        zs = cs_[2, :].tolist()
-        ax.scatter(xs, ys, zs, label = "L-" + cs_name[i])
+    for i in range(len(cs_name)):
+        cs = arm_data.cpoints_x[1, arm_data.cpoints_link == i]
+        ax.scatter(cs[:, 0], cs[:, 1], cs[:, 2], label = "R-" + cs_name[i])
+    for i in range(len(cs_name)):
+        cs = arm_data.cpoints_x[0, arm_data.cpoints_link == i]
+        ax.scatter(cs[:, 0], cs[:, 1], cs[:, 2], label = "L-" + cs_name[i])
 
 
     ## 三軸のスケールを揃える
@@ -0,0 +1,194 @@
+"""動力学パラメータの同定（最小二乗法）
+
+τ = Y(q, dq, ddq) π のリグレッサ（NewtonEulerDynamics.regressor_batch）を使って，
+記録した軌道のトルクから慣性パラメータ π を推定する．
+π はリンクごとに [m, m x, m y, m z, Ixx, Iyy, Izz, Ixy, Iyz, Ixz]（newton_euler.pseudo_inertiaの並び）．
+リグレッサには軌道から決まらない方向があるので，π0（今のパラメータ）へ寄せる正則化を入れて解く．
+"""
+
+import numpy as np
+import yaml
+import time
+
+from lagrange import BaxterDynamics
+from newton_euler import NewtonEulerDynamics
+
+
+PARAMETER_KEYS = ('m', 'x_bar', 'y_bar', 'z_bar', 'Ixx', 'Iyy', 'Izz', 'Ixy', 'Iyz', 'Ixz')  # 保存するBaxterDynamicsの属性
+
+
+def get_parameters(model):
+    """BaxterDynamicsの慣性パラメータ π (10n,)"""
+
+    z = np.zeros((model.n, 10))
+    for i in range(model.n):
+        m = model.m[i]
+        z[i] = [
+            m, m*model.x_bar[i], m*model.y_bar[i], m*model.z_bar[i],
+            model.Ixx[i], model.Iyy[i], model.Izz[i],
+            model.Ixy[i], model.Iyz[i], model.Ixz[i],
+        ]
+    return z.reshape(-1)
+
+
+def set_parameters(model, p):
+    """慣性パラメータ π (10n,) をBaxterDynamicsのインスタンスに書き込む
+
+    クラスの値はそのままで，インスタンスの属性で上書きする
+    """
+
+    p = np.reshape(p, (model.n, 10))
+    m = p[:, 0]
+    if np.any(m <= 0):
+        raise ValueError('質量が正でないリンクがあります : ' + str(m))
+
+    values = {
+        'm' : m,
+        'x_bar' : p[:, 1] / m,
+        'y_bar' : p[:, 2] / m,
+        'z_bar' : p[:, 3] / m,
+        'Ixx' : p[:, 4],
+        'Iyy' : p[:, 5],
+        'Izz' : p[:, 6],
+        'Ixy' : p[:, 7],
+        'Iyz' : p[:, 8],
+        'Ixz' : p[:, 9],
+    }
+    for key, value in values.items():
+        setattr(model, key, tuple(float(x) for x in value))
+    model.clear_cache()
+
+    return model
+
+
+def save_parameters(model, path):
+    """BaxterDynamicsの慣性パラメータをyamlに保存"""
+
+    data = {key : [float(x) for x in getattr(model, key)] for key in PARAMETER_KEYS}
+    with open(path, 'w', encoding='UTF-8') as file:
+        yaml.safe_dump(data, file)
+
+    return
+
+
+def load_parameters(path):
+    """save_parametersで保存した慣性パラメータを持つBaxterDynamics"""
+
+    with open(path, encoding='UTF-8') as file:
+        data = yaml.safe_load(file.read())
+
+    model = BaxterDynamics()
+    for key in PARAMETER_KEYS:
+        setattr(model, key, tuple(data[key]))
+    model.clear_cache()
+
+    return model
+
+
+def identify_parameters(
+    q, dq, ddq, tau, model=None, regularization=1e-6, chunk=10000,
+):
+    """記録した軌道から慣性パラメータを同定
+
+    min |Y π - τ|^2 + λ |π - π0|^2 を解く．λ = regularization * mean(diag(Y^T Y))．
+    Y^T Y と Y^T τ をchunkごとに足していくので，サンプル数が多くてもメモリは増えない
+
+    q, dq, ddq : 関節角度，角速度，角加速度 (N, n)
+    tau : 関節トルク (N, n)
+    model : π0を持つBaxterDynamics．Noneならバクスターのもの
+    戻り値 : 同定したパラメータを書き込んだBaxterDynamics, 同定後のトルクの残差のRMS (n,)
+    """
+
+    if model is None:
+        model = BaxterDynamics()
+    ne = NewtonEulerDynamics(model)
+    p0 = get_parameters(model)
+    n_p = len(p0)
+
+    q = np.atleast_2d(q)
+    tau = np.atleast_2d(tau)
+    YtY = np.zeros((n_p, n_p))
+    Ytt = np.zeros(n_p)
+    for start in range(0, len(q), chunk):
+        s = slice(start, start + chunk)
+        Y = ne.regressor_batch(q[s], dq[s], ddq[s]).reshape(-1, n_p)
+        YtY += Y.T @ Y
+        Ytt += Y.T @ tau[s].reshape(-1)
+
+    lam = regularization * np.mean(np.diag(YtY))
+    p = np.linalg.solve(YtY + lam * np.eye(n_p), Ytt + lam * p0)
+
+    # 残差 |Y π - τ|^2 = π^T Y^T Y π - 2 π^T Y^T τ + |τ|^2 は関節ごとには出ないのでもう一度計算
+    residual = np.zeros(model.n)
+    for start in range(0, len(q), chunk):
+        s = slice(start, start + chunk)
+        Y = ne.regressor_batch(q[s], dq[s], ddq[s])
+        residual += np.sum((Y @ p - tau[s])**2, axis=0)
+    rms = np.sqrt(residual / len(q))
+
+    identified = set_parameters(BaxterDynamics(), p)
+
+    return identified, rms
+
+
+
+def _test():
+    import os
+    import tempfile
+
+    nominal = BaxterDynamics()
+    ne = NewtonEulerDynamics(nominal)
+    rng = np.random.default_rng(0)
+
+    # リグレッサとRNEAのトルクが一致するか
+    N = 100000
+    q = rng.uniform(-np.pi, np.pi, (N, 7))
+    dq = rng.normal(size=(N, 7))
+    ddq = rng.normal(size=(N, 7))
+
+    start = time.time()
+    Y = ne.regressor_batch(q, dq, ddq)
+    print("リグレッサの計算時間 ", time.time() - start, "（", N, "サンプル）")
+    k = slice(0, 1000)
+    err = np.abs(Y[k] @ get_parameters(nominal) - ne.inverse_dynamics_batch(q[k], dq[k], ddq[k])).max()
+    print("Y π とRNEAの差 ", err)
+    assert err < 1e-10
+    del Y
+
+    # パラメータをずらした腕のトルクから同定
+    true = set_parameters(
+        BaxterDynamics(), get_parameters(nominal) * rng.uniform(0.8, 1.2, 70)
+    )
+    tau = NewtonEulerDynamics(true).inverse_dynamics_batch(q, dq, ddq)
+    tau += rng.normal(scale=0.01, size=tau.shape)  # センサの雑音
+
+    start = time.time()
+    identified, rms = identify_parameters(q, dq, ddq, tau)
+    print("同定時間 ", time.time() - start)
+    print("残差のRMS ", rms)
+
+    # 別の状態でのトルクの予測誤差
+    q2 = rng.uniform(-np.pi, np.pi, (1000, 7))
+    dq2 = rng.normal(size=(1000, 7))
+    ddq2 = rng.normal(size=(1000, 7))
+    tau2 = NewtonEulerDynamics(true).inverse_dynamics_batch(q2, dq2, ddq2)
+    err_nominal = np.abs(NewtonEulerDynamics(nominal).inverse_dynamics_batch(q2, dq2, ddq2) - tau2).max()
+    err_identified = np.abs(NewtonEulerDynamics(identified).inverse_dynamics_batch(q2, dq2, ddq2) - tau2).max()
+    print("トルクの予測誤差 同定前 ", err_nominal, " 同定後 ", err_identified)
+    assert err_identified < 0.1 * err_nominal
+
+    # 保存して読み直してもBaxterDynamicsとして使える
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'identified.yaml')
+        save_parameters(identified, path)
+        loaded = load_parameters(path)
+    x = q2[0:1].T, dq2[0:1].T, ddq2[0:1].T
+    err_loaded = np.abs(loaded.calc_torque(*x) - NewtonEulerDynamics(identified).calc_torque(*x)).max()
+    print("読み直したパラメータのトルクの差 ", err_loaded)
+    assert err_loaded < 1e-10
+
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,211 @@
+"""逆運動学（減衰最小二乗法）"""
+
+import numpy as np
+import time
+
+from kinematics import BaxterRobotArmKinematics, cross_jacobian
+
+
+class IKResult:
+    """逆運動学の結果
+
+    q : 関節角度 (N, dof)
+    error : 手先位置の誤差のノルム (N,)
+    success : 誤差がtol以下になったか否か (N,)
+    iterations : 目標ごとの反復回数 (N,)
+    """
+
+    def __init__(self, q, error, success, iterations):
+        self.q = q
+        self.error = error
+        self.success = success
+        self.iterations = iterations
+        return
+
+
+def tool_position_and_jacobian(arm, q):
+    """手先位置 (N, 3) とそのヤコビ行列 (N, 3, dof) をまとめて計算
+
+    arm : SerialChainKinematics
+    q : 関節角度 (N, dof)
+    """
+
+    nb, n = arm.n_base, arm.dof
+    Ts_Wo = arm._batch_transforms(q, arm.Ts_base_Wo)
+    x = Ts_Wo[:, -1, 0:3, 3]
+    J = cross_jacobian(
+        Ts_Wo[:, nb:nb+n, 0:3, 2], Ts_Wo[:, nb:nb+n, 0:3, 3], x[:, None, :],
+        np.ones((1, n), dtype=bool)
+    )[:, 0]
+    return x, J
+
+
+def _dls_step(J, e, lam, I):
+    """減衰最小二乗法の1ステップ J^T (J J^T + λ^2 I)^-1 e (N, dof)"""
+    JT = J.transpose(0, 2, 1)
+    A = J @ JT + lam[:, None, None]**2 * I
+    return (JT @ np.linalg.solve(A, e[:, :, None]))[:, :, 0]
+
+
+def solve_ik(
+    arm, x_goal, q0=None, tol=1e-4, max_iter=100, damping=1e-2, max_step=0.2,
+):
+    """手先位置の逆運動学をLevenberg-Marquardt法でまとめて解く
+
+    dq = J^T (J J^T + λ^2 I)^-1 e を目標ごとに計算し，誤差が減ればλを小さく，
+    増えればλを大きくしてやり直す．関節角度は毎回q_min, q_maxに収める
+
+    arm : SerialChainKinematics
+    x_goal : 目標の手先位置 (N, 3)
+    q0 : 初期値 (N, dof) か (dof,)．前の解を渡せばウォームスタート．Noneならq_neutral
+    tol : 収束判定に使う手先位置の誤差 [m]
+    max_iter : 最大反復回数
+    damping : λの初期値
+    max_step : 1回で動かす関節角度の最大値 [rad]
+    """
+
+    x_goal = np.atleast_2d(np.asarray(x_goal, dtype=np.float64))
+    N = x_goal.shape[0]
+    q_min = np.ravel(arm.q_min)
+    q_max = np.ravel(arm.q_max)
+
+    if q0 is None:
+        q0 = np.ravel(arm.q_neutral)
+    q = np.clip(np.broadcast_to(q0, (N, arm.dof)), q_min, q_max)
+    lam = np.full(N, damping)
+    I = np.eye(3)
+
+    x, J = tool_position_and_jacobian(arm, q)
+    e = x_goal - x
+    error = np.linalg.norm(e, axis=1)
+
+    iterations = np.zeros(N, dtype=int)
+    for _ in range(max_iter):
+        idx = np.flatnonzero(error > tol)  # 未収束のものだけ更新
+        if len(idx) == 0:
+            break
+        iterations[idx] += 1
+
+        Ja = J[idx]
+        step = _dls_step(Ja, e[idx], lam[idx], I)
+
+        # 制限に張り付いた関節が外へ出ようとするなら，その関節を除いて解き直す
+        qa = q[idx]
+        blocked = ((qa <= q_min) & (step < 0)) | ((qa >= q_max) & (step > 0))
+        if blocked.any():
+            Ja = Ja * ~blocked[:, None, :]
+            step = _dls_step(Ja, e[idx], lam[idx], I)
+
+        scale = np.maximum(np.abs(step).max(axis=1) / max_step, 1)
+        q_new = np.clip(q[idx] + step / scale[:, None], q_min, q_max)
+
+        x_new, J_new = tool_position_and_jacobian(arm, q_new)
+        e_new = x_goal[idx] - x_new
+        error_new = np.linalg.norm(e_new, axis=1)
+
+        better = error_new < error[idx]
+        acc = idx[better]
+        q[acc] = q_new[better]
+        J[acc] = J_new[better]
+        e[acc] = e_new[better]
+        error[acc] = error_new[better]
+        lam[acc] = np.maximum(lam[acc] * 0.5, 1e-6)
+        lam[idx[~better]] *= 4
+
+    return IKResult(q, error, error <= tol, iterations)
+
+
+def check_reachable(arm, x_goal, tol=1e-3, **kwargs):
+    """目標位置に手先が届くか否か (N,)
+
+    kwargsはsolve_ikに渡す
+    """
+    return solve_ik(arm, x_goal, tol=tol, **kwargs).success
+
+
+def check_reachable_sequence(arm, x_goal, tol=1e-3, warm_iter=10, **kwargs):
+    """時系列の目標位置に手先が届くか否か (N,)
+
+    同じ目標は1回だけ解く．初めて出てきた順に，最後に届いた解からwarm_iter回まで
+    ウォームスタートで解き（動く目標なら1目標あたり1, 2回の反復で済む），
+    それで解けなかったものだけq_neutralからまとめて解き直す
+
+    x_goal : 時刻順の目標位置 (N, 3)
+    warm_iter : ウォームスタートの最大反復回数
+    kwargsはsolve_ikに渡す
+    """
+
+    x_goal = np.atleast_2d(np.asarray(x_goal, dtype=np.float64))
+    unique, first, inverse = np.unique(x_goal, axis=0, return_index=True, return_inverse=True)
+    inverse = np.ravel(inverse)
+    warm_kwargs = dict(kwargs, max_iter=warm_iter)
+
+    success = np.zeros(len(unique), dtype=bool)
+    q = None  # 最後に届いた解
+    for n, i in enumerate(np.argsort(first)):  # 時刻順
+        if q is None:
+            if n > 0:
+                continue  # 最初の目標が届かなければ後でまとめて解く
+            result = solve_ik(arm, unique[i:i+1], tol=tol, **kwargs)
+        else:
+            result = solve_ik(arm, unique[i:i+1], q0=q, tol=tol, **warm_kwargs)
+        if result.success[0]:
+            success[i] = True
+            q = result.q[0]
+
+    retry = np.flatnonzero(~success)
+    if len(retry) > 0:
+        success[retry] = solve_ik(arm, unique[retry], tol=tol, **kwargs).success
+
+    return success[inverse]
+
+
+
+def _test():
+    arm = BaxterRobotArmKinematics(isLeft=True)
+    rng = np.random.default_rng(0)
+    N = 500
+
+    # 届く目標（ランダムな関節角度の手先位置）
+    q_true = rng.uniform(np.ravel(arm.q_min), np.ravel(arm.q_max), (N, arm.dof))
+    x_goal, _ = tool_position_and_jacobian(arm, q_true)
+
+    start = time.time()
+    result = solve_ik(arm, x_goal)
+    print("コールドスタート")
+    print("  成功率 ", result.success.mean(), " 反復回数（中央値） ", np.median(result.iterations))
+    print("  実行時間 ", time.time() - start)
+
+    # 少し動いた目標をウォームスタートで解く
+    x_goal_2 = x_goal + rng.normal(scale=5e-3, size=x_goal.shape)
+    ok = result.success
+    result_2 = solve_ik(arm, x_goal_2[ok], q0=result.q[ok])
+    print("ウォームスタート")
+    print("  成功率 ", result_2.success.mean(), " 反復回数（中央値） ", np.median(result_2.iterations))
+
+    # 届かない目標
+    far = solve_ik(arm, np.array([[3.0, 0.0, 1.0]]))
+    print("届かない目標 ", far.success, far.error)
+
+    # 時系列の目標（円軌道の途中から届かなくなる，止まっている目標の繰り返し）
+    t = np.linspace(0, 2*np.pi, 600)
+    circle = np.stack([0.6 + 0.8*np.cos(t), 0.3 + 0.8*np.sin(t), np.full_like(t, 1.0)], axis=1)
+    goals = np.concatenate([circle, np.repeat(x_goal[:1], 6000, axis=0)])
+    start = time.time()
+    seq = check_reachable_sequence(arm, goals)
+    t_seq = time.time() - start
+    start = time.time()
+    batch = check_reachable(arm, goals)
+    t_batch = time.time() - start
+    print("時系列の目標 届く割合 ", seq.mean(), " 一度に解いたものとの不一致 ", (seq != batch).sum())
+    print("  実行時間 ", t_seq, "（一度に解くと ", t_batch, "）")
+    assert seq[600:].all()
+
+    assert np.all(result.q >= arm.q_min.T - 1e-12)
+    assert np.all(result.q <= arm.q_max.T + 1e-12)
+
+    return
+
+
+if __name__ == "__main__":
+    _test()
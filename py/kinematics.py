@@ -3,6 +3,8 @@ import matplotlib.pyplot as plt
 from math import cos, sin, tan, pi
 import math
 import time
+import os
+import yaml
 
 from numpy.lib.shape_base import expand_dims
 
@@ -71,91 +73,207 @@ class HomogeneousTransformationMatrix:
         )
 
 
-class BaxterRobotArmKinematics:
-    
-    # パラメータ
-    L = 278e-3
-    h = 64e-3
-    H = 1104e-3
-    L0 = 270.35e-3
-    L1 = 69e-3
-    L2 = 364.35e-3
-    L3 = 69e-3
-    L4 = 374.29e-3
-    L5 = 10e-3
-    L6 = 368.3e-3
-
-    q_neutral = np.array([[0, -31, 0, 43, 0, 72, 0]]).T * pi/180  # ニュートラルの姿勢
-    q_min = np.array([[-141, -123, -173, -3, -175, -90, -175]]).T * pi/180
-    q_max = np.array([[51, 60, 173, 150, 175, 120, 175]]).T * pi/180
-
-    # 制御点のローカル座標
-    
-    R = 0.05
-    
-    r_bars_in_1 = [
-        np.array([[0, L1/2, -L0/2, 1]]).T,
-        # np.array([[0, -L1/2, -L0/2, 1]]).T,
-        # np.array([[L1/2, 0, -L0/2, 1]]).T,
-        # np.array([[-L1/2, 0, -L0/2, 1]]).T,
-    ]  # 1座標系からみた制御点位置
-
-    r_bars_in_2 = [
-        np.array([[0, 0, L3/2, 1]]).T,
-        np.array([[0, 0, -L3/2, 1]]).T,
-    ]
-
-    r_bars_in_3 = [
-        np.array([[0, L3/2, -L2*2/3, 1]]).T,
-        np.array([[0, -L3/2, -L2*2/3, 1]]).T,
-        np.array([[L3/2, 0, -L2*2/3, 1]]).T,
-        np.array([[-L3/2, 0, -L2*2/3, 1]]).T,
-        np.array([[0, L3/2, -L2*1/3, 1]]).T,
-        np.array([[0, -L3/2, -L2*1/3, 1]]).T,
-        np.array([[L3/2, 0, -L2*1/3, 1]]).T,
-        np.array([[-L3/2, 0, -L2*1/3, 1]]).T,
-    ]
-
-    r_bars_in_4 = [
-        np.array([[0, 0, L3/2, 1]]).T,
-        np.array([[0, 0, -L3/2, 1]]).T,
-    ]
-
-    r_bars_in_5 = [
-        np.array([[0, R/2, -L4/3, 1]]).T,
-        np.array([[0, -R/2, -L4/3, 1]]).T,
-        np.array([[R/2, 0, -L4/3, 1]]).T,
-        np.array([[-R/2, 0, -L4/3, 1]]).T,
-        np.array([[0, R/2, -L4/3*2, 1]]).T,
-        np.array([[0, -R/2, -L4/3*2, 1]]).T,
-        np.array([[R/2, 0, -L4/3*2, 1]]).T,
-        np.array([[-R/2, 0, -L4/3*2, 1]]).T,
-    ]
-
-    r_bars_in_6 = [
-        np.array([[0, 0, L5/2, 1]]).T,
-        np.array([[0, 0, -L5/2, 1]]).T,
-    ]
-
-    r_bars_in_7 = [
-        np.array([[0, R/2, L6/2, 1]]).T,
-        np.array([[0, -R/2, L6/2, 1]]).T,
-        np.array([[R/2, 0, L6/2, 1]]).T,
-        np.array([[-R/2, 0, L6/2, 1]]).T,
-    ]
-
-    r_bars_in_GL = [
-        np.array([[0, 0, 0, 1]]).T
-    ]
-
-    # 追加
-    r_bars_all = [
-        r_bars_in_1, r_bars_in_2, r_bars_in_3, r_bars_in_4, r_bars_in_5, r_bars_in_6, r_bars_in_7, r_bars_in_GL,
-    ]
-
-    r_bar_zero = np.array([[0, 0, 0, 1]]).T
+KINEMATICS_OUTPUTS = ('positions', 'jacobians', 'velocities', 'dJ')  # update_allのneedに指定できるもの
+
+
+def expand_need(need):
+    """needに依存する出力を足す（Noneなら全部）"""
+    if need is None:
+        return set(KINEMATICS_OUTPUTS)
+    need = set(need) | {'positions'}
+    if 'dJ' in need:
+        need.add('velocities')
+    if 'velocities' in need:
+        need.add('jacobians')
+    return need
+
+
+def dh_transforms(alpha, a, d, theta, ca=None, sa=None):
+    """同次変換行列をまとめて計算（HomogeneousTransformationMatrix.updateのベクトル化版）
+
+    alpha, a, d : DHパラメータ (n,)
+    theta : 関節角度 (..., n)
+    ca, sa : 計算済みのcos(alpha), sin(alpha)．Noneならここで計算
+    戻り値 : (..., n, 4, 4)
+    """
+    theta = np.asarray(theta, dtype=np.float64)
+    ct, st = np.cos(theta), np.sin(theta)
+    if ca is None:
+        ca, sa = np.cos(alpha), np.sin(alpha)
+
+    T = np.zeros(theta.shape + (4, 4))
+    T[..., 0, 0] = ct
+    T[..., 0, 1] = -st
+    T[..., 0, 3] = a
+    T[..., 1, 0] = st * ca
+    T[..., 1, 1] = ct * ca
+    T[..., 1, 2] = -sa
+    T[..., 1, 3] = -d * sa
+    T[..., 2, 0] = st * sa
+    T[..., 2, 1] = ct * sa
+    T[..., 2, 2] = ca
+    T[..., 2, 3] = d * ca
+    T[..., 3, 3] = 1
+    return T
+
+
+def stack_r_bars(r_bars_all):
+    """入れ子リストの制御点を (K,4) の表とリンク番号 (K,) に変換"""
+    r_bars = []
+    links = []
+    for i, r_bars_in_i in enumerate(r_bars_all):
+        for r_bar in r_bars_in_i:
+            r_bars.append(np.ravel(r_bar))
+            links.append(i)
+    return np.array(r_bars, dtype=np.float64), np.array(links, dtype=np.intp)
+
+
+def nest_by_link(stack, link, n):
+    """(K, ...) の配列をリンクごとの入れ子リスト（中身はビュー）に変換
     
+    (K,3) の配列は (3,1) の縦ベクトルとして並べる
+    """
+    if stack.ndim == 2:
+        stack = stack[:, :, None]
+    return [[stack[k] for k in np.flatnonzero(link == i)] for i in range(n)]
 
+
+def fixed_transform(xyz=(0, 0, 0), rpy=(0, 0, 0)):
+    """位置と姿勢（ロール・ピッチ・ヨー [deg]）から同次変換行列を作成
+    
+    R = Rz(yaw) @ Ry(pitch) @ Rx(roll)
+    """
+    r, p, y = np.radians(rpy)
+    Rx = np.array([[1, 0, 0], [0, cos(r), -sin(r)], [0, sin(r), cos(r)]])
+    Ry = np.array([[cos(p), 0, sin(p)], [0, 1, 0], [-sin(p), 0, cos(p)]])
+    Rz = np.array([[cos(y), -sin(y), 0], [sin(y), cos(y), 0], [0, 0, 1]])
+    
+    T = np.eye(4)
+    T[0:3, 0:3] = Rz @ Ry @ Rx
+    T[0:3, 3] = xyz
+    return T
+
+
+def load_chain_spec(path, arm=None):
+    """直列リンクの仕様をyamlから読み込む
+    
+    path : 仕様のyaml（config/baxter.yaml参照）
+    arm : armsの中の腕の名前．その腕の項目で共通の項目を上書きする
+    """
+    
+    with open(path, encoding='UTF-8') as file:
+        spec = yaml.safe_load(file.read())
+    
+    arms = spec.pop('arms', None) or {}
+    if arm is not None:
+        spec.update(arms[arm])
+    
+    return spec
+
+
+def cross_jacobian(zs, origins, x, mask):
+    """関節軸と原点から制御点位置のヤコビ行列を計算
+
+    zs : 各関節のz軸 (..., n, 3)
+    origins : 各関節の原点 (..., n, 3)
+    x : 制御点位置 (..., K, 3)
+    mask : 制御点に影響する関節か否か (K, n)
+    戻り値 : (..., K, 3, n)
+    """
+    J = np.cross(
+        zs[..., None, :, :], x[..., :, None, :] - origins[..., None, :, :]
+    )  # (..., K, n, 3)
+    J *= mask[..., None]
+    return np.swapaxes(J, -1, -2)
+
+
+def cross_jacobian_dot(zs, origins, x, dx, dq, mask):
+    """ヤコビ行列の時間微分を角速度の漸化式から計算
+
+    ω_i = ω_(i-1) + z_i dq_i
+    dz_i/dt = ω_(i-1) × z_i
+    do_i/dt = do_(i-1)/dt + ω_(i-1) × (o_i - o_(i-1))
+    dJ_i/dt = dz_i/dt × (x - o_i) + z_i × (dx - do_i/dt)
+
+    zs, origins : 各関節のz軸と原点 (..., n, 3)
+    x, dx : 制御点の位置と速度 (..., K, 3)
+    dq : 関節角速度 (..., n)
+    mask : 制御点に影響する関節か否か (K, n)
+    戻り値 : dJ (..., K, 3, n), dJ @ dq (..., K, 3)
+    """
+    w = np.cumsum(zs * dq[..., None], axis=-2)
+    w_prev = np.zeros_like(w)
+    w_prev[..., 1:, :] = w[..., :-1, :]
+    dz = np.cross(w_prev, zs)
+    do = np.zeros_like(w)
+    do[..., 1:, :] = np.cumsum(
+        np.cross(w_prev[..., 1:, :], origins[..., 1:, :] - origins[..., :-1, :]),
+        axis=-2,
+    )
+
+    dJ = np.cross(dz[..., None, :, :], x[..., :, None, :] - origins[..., None, :, :])
+    dJ += np.cross(zs[..., None, :, :], dx[..., :, None, :] - do[..., None, :, :])
+    dJ *= mask[..., None]
+    dJ = np.swapaxes(dJ, -1, -2)
+    return dJ, np.einsum('...kij,...j->...ki', dJ, dq)
+
+
+def _skew(v, out):
+    """歪対称行列をoutに書き込む（対角成分は0のまま）"""
+    out[..., 0, 1] = -v[..., 2]
+    out[..., 0, 2] = v[..., 1]
+    out[..., 1, 0] = v[..., 2]
+    out[..., 1, 2] = -v[..., 0]
+    out[..., 2, 0] = -v[..., 1]
+    out[..., 2, 1] = v[..., 0]
+    return out
+
+
+class KinematicsBatchData:
+    """N個の関節角度に対する運動学の計算結果（DualArmKinematicsでは (N, 2, ...)）
+
+    Ts_Wo : Wo基準の同次変換行列 (N, F, 4, 4)．Baxterなら F=10
+    joint_positions : ジョイント原点座標（台座の原点を含む） (N, F+1, 3)
+    cpoints_x : 制御点位置 (N, K, 3)
+    cpoints_dx : 制御点速度 (N, K, 3)
+    Jos_cpoints : 制御点位置のヤコビ行列 (N, K, 3, dof)
+    dJos_cpoints : ヤコビ行列の時間微分 (N, K, 3, dof)
+    dJdq_cpoints : dJ @ dq (N, K, 3)
+    cpoints_link : 制御点が属するリンク番号 (K,)
+    
+    計算しなかったもの（calc_all_batchのneed参照）はNone
+    """
+
+    def __init__(
+        self, Ts_Wo, cpoints_x, cpoints_link, cpoints_dx=None, Jos_cpoints=None,
+        dJos_cpoints=None, dJdq_cpoints=None,
+    ):
+        self.Ts_Wo = Ts_Wo
+        self.cpoints_x = cpoints_x
+        self.cpoints_dx = cpoints_dx
+        self.Jos_cpoints = Jos_cpoints
+        self.dJos_cpoints = dJos_cpoints
+        self.dJdq_cpoints = dJdq_cpoints
+        self.cpoints_link = cpoints_link
+
+        self.joint_positions = np.zeros(Ts_Wo.shape[:-3] + (Ts_Wo.shape[-3]+1, 3))
+        self.joint_positions[..., 1:, :] = Ts_Wo[..., 0:3, 3]
+        return
+
+
+class SerialChainKinematics:
+    """DH表・台座・手先・制御点の仕様から作る直列リンクの運動学
+    
+    仕様はload_chain_specで読んだ辞書．項目は
+      DH : alpha [deg], a [m], d [m], theta（関節角度に足すオフセット）[deg]．修正DH法
+      base : Woから1番目の関節の手前までの固定の変換（xyz, rpy）のリスト
+      tool : 最後の関節から手先への固定の変換
+      cpoints : リンクごとの制御点（最後は手先座標系）
+      q_neutral, q_min, q_max : 関節角度 [deg]
+    
+    Ts_Woは台座（len(base)個），関節（dof個），手先の順に並ぶ
+    """
+    
     A = HomogeneousTransformationMatrix(
         M=np.array([
             [0, -1, 0, 0],
@@ -165,116 +283,228 @@ class BaxterRobotArmKinematics:
         ])
     )  # 偏微分演算行列
     
+    # 初めて参照されたときに計算する属性と，それを計算するメソッド
+    _lazy_steps = {
+        'Ts_diff_by_t': '_update_HomogeneousTransformationMatrix_by_t',
+        'Ts_Wo_diff_by_t': '_update_HomogeneousTransformationMatrix_by_t',
+        'Jaxs': '_update_diff_HomogeneousTransformationMatrix_by_q',
+        'Jays': '_update_diff_HomogeneousTransformationMatrix_by_q',
+        'Jazs': '_update_diff_HomogeneousTransformationMatrix_by_q',
+        'Jos': '_update_diff_HomogeneousTransformationMatrix_by_q',
+        'Jaxs_diff_by_t': '_update_diff_HomogeneousTransformationMatrix_by_t',
+        'Jays_diff_by_t': '_update_diff_HomogeneousTransformationMatrix_by_t',
+        'Jazs_diff_by_t': '_update_diff_HomogeneousTransformationMatrix_by_t',
+        'Jos_diff_by_t': '_update_diff_HomogeneousTransformationMatrix_by_t',
+        'Jos_joint': '_update_jacobian_by_q',
+        'Jos_cpoints': '_update_jacobian_by_q',
+        'Jos_cpoints_stack': '_update_jacobian_by_q',
+        'Jos_cpoints_diff_by_t': '_update_jacobian_by_t',
+        'cpoints_dx': '_update_cpoints_dx',
+        'cpoints_dx_stack': '_update_cpoints_dx',
+    }
     
-    def __init__(self, isLeft):
+    # isGeometricJacobian=Trueのとき
+    _lazy_steps_geometric = dict(
+        _lazy_steps,
+        Jos_joint='_update_jacobian_cross',
+        Jos_cpoints='_update_jacobian_cross',
+        Jos_cpoints_stack='_update_jacobian_cross',
+        Jos_cpoints_diff_by_t='_update_jacobian_cross',
+        dJos_cpoints_stack='_update_jacobian_cross',
+        dJdq_cpoints_stack='_update_jacobian_cross',
+    )
+    
+    # needの各項目を用意するために参照する属性
+    _need_attrs = {
+        'positions': (),
+        'jacobians': ('Jos_cpoints',),
+        'velocities': ('cpoints_dx',),
+        'dJ': ('Jos_cpoints_diff_by_t',),
+    }
+    
+    
+    def __init__(self, spec, isGeometricJacobian=False):
         """
         
-        isLeft : 左手か否か
+        spec : 直列リンクの仕様（load_chain_spec参照）
+        isGeometricJacobian : ヤコビ行列を関節軸と原点の外積から計算するか否か
         """
         
-        self.isLeft = isLeft
+        self._set_spec(spec)
+        self.isGeometricJacobian = isGeometricJacobian
         
-        self.q = self.q_neutral  # 左手の関節角度ベクトル
-        self.dq = np.zeros((7, 1))  # 左手の関節角速度ベクトル
+        self.q = self.q_neutral  # 関節角度ベクトル
+        self.dq = np.zeros((self.dof, 1))  # 関節角速度ベクトル
         
-        self.update_all(self.q, self.dq)
+        self.update_all(self.q, self.dq, need={'positions'})
         
         return
     
     
-    def update_all(self, q, dq):
-        """全情報を更新"""
+    def _set_spec(self, spec):
+        """仕様から定数を作成"""
+        
+        self.spec = spec
+        self.name = spec.get('name')
+        
+        # DHパラメータ
+        DH = spec['DH']
+        self.DH_alpha = np.radians(np.array(DH['alpha'], dtype=np.float64))
+        self.DH_a = np.array(DH['a'], dtype=np.float64)
+        self.DH_d = np.array(DH['d'], dtype=np.float64)
+        self.DH_theta = np.radians(np.array(DH['theta'], dtype=np.float64))  # 関節角度に足すオフセット
+        self.dof = len(self.DH_alpha)
+        self._ca = np.cos(self.DH_alpha)
+        self._sa = np.sin(self.DH_alpha)
+        
+        # 関節角度によらない同次変換行列
+        self.T_base = [fixed_transform(**T) for T in spec['base']]
+        self.T_tool = fixed_transform(**spec['tool'])
+        self.n_base = len(self.T_base)
+        self.Ts_base_Wo = [self.T_base[0]]  # Wo基準の台座の同次変換行列
+        for T in self.T_base[1:]:
+            self.Ts_base_Wo.append(self.Ts_base_Wo[-1] @ T)
+        
+        self.q_neutral = np.radians(np.array([spec['q_neutral']], dtype=np.float64)).T  # ニュートラルの姿勢
+        self.q_min = np.radians(np.array([spec['q_min']], dtype=np.float64)).T
+        self.q_max = np.radians(np.array([spec['q_max']], dtype=np.float64)).T
+        
+        # 制御点のローカル座標
+        self.r_bars_all = [
+            [np.array([[x, y, z, 1]], dtype=np.float64).T for x, y, z in cpoints]
+            for cpoints in spec['cpoints']
+        ]
+        self.r_bar_zero = np.array([[0, 0, 0, 1]]).T
+        self.r_bars_table, self.r_bars_link = stack_r_bars(self.r_bars_all)  # 制御点の表 (K,4) とリンク番号 (K,)
+        self.cpoints_mask = np.arange(self.dof)[None, :] <= self.r_bars_link[:, None]  # 制御点に影響する関節 (K,dof)
+        
+        return
+    
+    
+    def __getattr__(self, name):
+        """未計算の属性を参照されたら，その場で計算する"""
+        
+        if self.__dict__.get('isGeometricJacobian', False):
+            steps = self._lazy_steps_geometric
+        else:
+            steps = self._lazy_steps
+        if name not in steps or '_dq' not in self.__dict__:
+            raise AttributeError(name)
+        
+        getattr(self, steps[name])()
+        return self.__dict__[name]
+    
+    
+    def update_all(self, q, dq, need=None):
+        """全情報を更新
+        
+        need : 今すぐ計算する出力（KINEMATICS_OUTPUTSの部分集合）．Noneなら全部  
+        含めなかったものは初めて参照されたときに計算する
+        """
 
         self._update_HomogeneousTransformationMatrix(q, dq)
-        self._update_diff_HomogeneousTransformationMatrix()
-        self._update_jacobian()
-        self._update_cpoints(dq)
+        self._update_cpoints()
+        
+        # 前の状態で計算したものを捨てる
+        for name in self._lazy_steps_geometric:
+            self.__dict__.pop(name, None)
+        
+        for n in expand_need(need):
+            for name in self._need_attrs[n]:
+                getattr(self, name)
         
         return
     
     
-    def _update_HomogeneousTransformationMatrix(self, q, dq):
-        """同時変換行列を更新"""
-
-        DHparams = [
-            DHparam(0, 0, 0, q[0, 0]),
-            DHparam(-pi/2, self.L1, 0, q[1, 0]+pi/2),
-            DHparam(pi/2, 0, self.L2, q[2, 0]),
-            DHparam(-pi/2, self.L3, 0, q[3, 0]),
-            DHparam(pi/2, 0, self.L4, q[4, 0]),
-            DHparam(-pi/2, self.L5, 0, q[5, 0]),
-            DHparam(pi/2, 0, 0, q[6, 0]),
-        ]
-
+    def calc_all_batch(self, q, dq=None, need=None):
+        """N個の関節角度についてまとめて計算
+        
+        q : 関節角度 (N, dof)
+        dq : 関節角速度 (N, dof)．位置だけならNoneでよい
+        need : 計算する出力（KINEMATICS_OUTPUTSの部分集合）．Noneなら全部
+        """
+        
+        if need is None and dq is None:
+            need = {'positions'}
+        
+        q = np.atleast_2d(q)
+        Ts_Wo = self._batch_transforms(q, self.Ts_base_Wo)
+        
+        return self._batch_outputs(Ts_Wo, dq, need)
     
-        # 同次変換行列（ローカル座標の）
+    
+    def _batch_transforms(self, q, Ts_base_Wo):
+        """Wo基準の同次変換行列（台座，関節，手先）をまとめて計算
         
-        if self.isLeft:  # 左手
-            T_BLorR_Wo = HomogeneousTransformationMatrix(
-                DHparam=None,
-                M=np.array([
-                    [math.sqrt(2)/2, math.sqrt(2)/2, 0, self.L,],
-                    [-math.sqrt(2)/2, math.sqrt(2)/2, 0, -self.h,],
-                    [0, 0, 1, self.H,],
-                    [0, 0, 0, 1,],
-                ])
-            )
-            
-            T_0_BLorR = HomogeneousTransformationMatrix(
-                DHparam=None,
-                M=np.array([
-                    [1, 0, 0, 0,],
-                    [0, 1, 0, 0,],
-                    [0, 0, 1, self.L0,],
-                    [0, 0, 0, 1,],
-                ])
-            )
+        q : 関節角度 (..., dof)
+        Ts_base_Wo : Wo基準の台座の同次変換行列．(..., n_base, 4, 4)にブロードキャストできるもの
+        戻り値 : (..., F, 4, 4)
+        """
         
-        else:  #右手
-            T_BLorR_Wo = HomogeneousTransformationMatrix(
-                DHparam=None,
-                M=np.array([
-                    [-math.sqrt(2)/2, math.sqrt(2)/2, 0, -self.L,],
-                    [-math.sqrt(2)/2, -math.sqrt(2)/2, 0, -self.h,],
-                    [0, 0, 1, self.H,],
-                    [0, 0, 0, 1,],
-                ])
-            )
-
-            T_0_BLorR = HomogeneousTransformationMatrix(
-                DHparam=None,
-                M=np.array([
-                    [1, 0, 0, 0,],
-                    [0, 1, 0, 0,],
-                    [0, 0, 1, self.L0,],
-                    [0, 0, 0, 1,],
-                ])
+        nb, n = self.n_base, self.dof
+        Ts = dh_transforms(
+            self.DH_alpha, self.DH_a, self.DH_d, q + self.DH_theta, self._ca, self._sa
+        )
+        
+        Ts_Wo = np.empty(q.shape[:-1] + (nb+n+1, 4, 4))
+        Ts_Wo[..., 0:nb, :, :] = Ts_base_Wo
+        for i in range(n):
+            np.matmul(
+                Ts_Wo[..., nb+i-1, :, :], Ts[..., i, :, :], out=Ts_Wo[..., nb+i, :, :]
             )
+        np.matmul(Ts_Wo[..., nb+n-1, :, :], self.T_tool, out=Ts_Wo[..., nb+n, :, :])
         
+        return Ts_Wo
+    
+    
+    def _batch_outputs(self, Ts_Wo, dq, need):
+        """同次変換行列 (..., F, 4, 4) から制御点の位置・ヤコビ行列などを計算"""
         
-        T_GR_7 = HomogeneousTransformationMatrix(
-            DHparam=None,
-            M=np.array([
-                [1, 0, 0, 0,],
-                [0, 1, 0, 0,],
-                [0, 0, 1, self.L6,],
-                [0, 0, 0, 1,],
-            ])
+        need = expand_need(need)
+        nb, n = self.n_base, self.dof
+        
+        # 制御点
+        link = self.r_bars_link
+        cpoints_x = np.einsum(
+            '...kij,kj->...ki', Ts_Wo[..., link+nb, 0:3, :], self.r_bars_table
         )
-
-        self.Ts = [T_BLorR_Wo, T_0_BLorR]
-        for param in DHparams:  # i-1からiへの同時変換行列を作成
-            self.Ts.append(HomogeneousTransformationMatrix(DHparam=param))
-        self.Ts.append(T_GR_7)
-
-        # 時間微分用
-        self.Ts_diff_by_t = [HomogeneousTransformationMatrix.zero()] * 2
-        for i, param in enumerate(DHparams):  # i-1からiへの同時変換行列を作成
-            self.Ts_diff_by_t.append(
-                HomogeneousTransformationMatrix.diff_by_theta(param, dq[i])
+        data = KinematicsBatchData(Ts_Wo, cpoints_x, link)
+        
+        if 'jacobians' in need:
+            zs = Ts_Wo[..., nb:nb+n, 0:3, 2]
+            origins = Ts_Wo[..., nb:nb+n, 0:3, 3]
+            mask = self.cpoints_mask
+            data.Jos_cpoints = cross_jacobian(zs, origins, cpoints_x, mask)
+        
+        if 'velocities' in need:
+            dq = np.asarray(dq, dtype=np.float64).reshape(Ts_Wo.shape[:-3] + (n,))
+            data.cpoints_dx = np.einsum('...kij,...j->...ki', data.Jos_cpoints, dq)
+        
+        if 'dJ' in need:
+            data.dJos_cpoints, data.dJdq_cpoints = cross_jacobian_dot(
+                zs, origins, cpoints_x, data.cpoints_dx, dq, mask
             )
-        self.Ts_diff_by_t.append(HomogeneousTransformationMatrix.zero())
+        
+        return data
+    
+    
+    def _update_HomogeneousTransformationMatrix(self, q, dq):
+        """同時変換行列を更新"""
+
+        theta = np.ravel(q) + self.DH_theta
+        DHparams = [
+            DHparam(*param)
+            for param in zip(self.DH_alpha, self.DH_a, self.DH_d, theta)
+        ]
 
+        # 同次変換行列（ローカル座標の）
+        self.Ts = [HomogeneousTransformationMatrix(M=T) for T in self.T_base]
+        Ts_joint = dh_transforms(
+            self.DH_alpha, self.DH_a, self.DH_d, theta, self._ca, self._sa
+        )
+        for T in Ts_joint:  # i-1からiへの同時変換行列
+            self.Ts.append(HomogeneousTransformationMatrix(M=T))
+        self.Ts.append(HomogeneousTransformationMatrix(M=self.T_tool))
 
         # Wo基準の同次変換行列を作成
         self.Ts_Wo = []  # Wo基準の同時変換行列
@@ -283,6 +513,22 @@ class BaxterRobotArmKinematics:
                 self.Ts_Wo.append(T)
             else:
                 self.Ts_Wo.append(self.Ts_Wo[-1] * T)
+        
+        self._DHparams = DHparams
+        self._dq = dq
+
+        return
+
+
+    def _update_HomogeneousTransformationMatrix_by_t(self,):
+        """時間微分用の同時変換行列を更新"""
+
+        self.Ts_diff_by_t = [HomogeneousTransformationMatrix.zero()] * self.n_base
+        for i, param in enumerate(self._DHparams):  # i-1からiへの同時変換行列を作成
+            self.Ts_diff_by_t.append(
+                HomogeneousTransformationMatrix.diff_by_theta(param, self._dq[i, 0])
+            )
+        self.Ts_diff_by_t.append(HomogeneousTransformationMatrix.zero())
 
         self.Ts_Wo_diff_by_t = []  # Wo基準の同時変換行列
         for i, T in enumerate(self.Ts_diff_by_t):
@@ -296,21 +542,31 @@ class BaxterRobotArmKinematics:
 
     def _update_diff_HomogeneousTransformationMatrix(self,):
         """微分同次変換行列？を更新 & ジョイントに関するヤコビ行列を更新"""
+        
+        self._update_diff_HomogeneousTransformationMatrix_by_q()
+        self._update_diff_HomogeneousTransformationMatrix_by_t()
+        
+        return
+    
+    
+    def _update_diff_HomogeneousTransformationMatrix_by_q(self,):
+        """位置のヤコビ行列用"""
 
+        nb = self.n_base
         dTj_dqis = []  # Woからjへの同時変換行列のqi微分を格納
-        for i in range(7):  # q1, q2, ..., q7
+        for i in range(self.dof):  # q1, q2, ..., qn
             dTj_dqi = []
-            for j in range(8):  # 1, 2, ..., 7, GL
+            for j in range(self.dof+1):  # 1, 2, ..., n, 手先
                 if j < i:
                     dTj_dqi.append(
                         HomogeneousTransformationMatrix.zero()
                     )
                 
                 elif j == i:
-                    dTj_dqi.append(self.Ts_Wo[j+2] * self.A)
+                    dTj_dqi.append(self.Ts_Wo[j+nb] * self.A)
                 
                 else:
-                    dTj_dqi.append(dTj_dqi[-1] * self.Ts[j+2])
+                    dTj_dqi.append(dTj_dqi[-1] * self.Ts[j+nb])
                 
             dTj_dqis.append(dTj_dqi)
         
@@ -335,23 +591,28 @@ class BaxterRobotArmKinematics:
             self.Jays.append(Jay)
             self.Jazs.append(Jaz)
             self.Jos.append(Jo)
-
-
-        # 時間微分のヤコビ行列に関するもの
+        
+        return
+    
+    
+    def _update_diff_HomogeneousTransformationMatrix_by_t(self,):
+        """時間微分のヤコビ行列に関するもの"""
+        
+        nb = self.n_base
         dTj_dqis = []  # Woからjへの同時変換行列のqi微分を格納
-        for i in range(7):  # q1, q2, ..., q7
+        for i in range(self.dof):  # q1, q2, ..., qn
             dTj_dqi = []
-            for j in range(8):  # 1, 2, ..., 7, GL
+            for j in range(self.dof+1):  # 1, 2, ..., n, 手先
                 if j < i:
                     dTj_dqi.append(
                         HomogeneousTransformationMatrix.zero()
                     )
                 
                 elif j == i:
-                    dTj_dqi.append(self.Ts_Wo_diff_by_t[j+2] * self.A)
+                    dTj_dqi.append(self.Ts_Wo_diff_by_t[j+nb] * self.A)
                 
                 else:
-                    dTj_dqi.append(dTj_dqi[-1] * self.Ts_diff_by_t[j+2])
+                    dTj_dqi.append(dTj_dqi[-1] * self.Ts_diff_by_t[j+nb])
                 
             dTj_dqis.append(dTj_dqi)
         
@@ -383,62 +644,110 @@ class BaxterRobotArmKinematics:
     def _update_jacobian(self,):
         """各制御点のヤコビ行列を更新"""
         
-        def _calc_Jo_global(Jax, Jay, Jaz, Jo, r_bar):
-            """Joのヤコビ行列"""
-            z_bar = (Jax * r_bar[0,0] + Jay * r_bar[1,0] + Jaz * r_bar[2,0] + Jo)
-            return z_bar[0:3, :]
-        
-        self.Jos_joint = []  # ジョイント基底のヤコビ行列
-        for Jax, Jay, Jaz, Jo in zip(self.Jaxs, self.Jays, self.Jazs, self.Jos):
-            self.Jos_joint.append(_calc_Jo_global(Jax, Jay, Jaz, Jo, self.r_bar_zero))
-
-        self.Jos_cpoints = []  # 制御点位置のヤコビ行列
-        for Jax, Jay, Jaz, Jo, r_bars in zip(
-            self.Jaxs, self.Jays, self.Jazs, self.Jos, self.r_bars_all
-        ):
-            J_ = []
-            for r_bar in r_bars:
-                J_.append(_calc_Jo_global(Jax, Jay, Jaz, Jo, r_bar))
-            self.Jos_cpoints.append(J_)
-
-
-        # 時間微分
-        self.Jos_cpoints_diff_by_t = []  # 制御点位置のヤコビ行列
-        for Jax, Jay, Jaz, Jo, r_bars in zip(
-            self.Jaxs_diff_by_t, self.Jays_diff_by_t, self.Jazs_diff_by_t, self.Jos_diff_by_t, self.r_bars_all
-        ):
-            J_ = []
-            for r_bar in r_bars:
-                J_.append(_calc_Jo_global(Jax, Jay, Jaz, Jo, r_bar))
-            self.Jos_cpoints_diff_by_t.append(J_)
+        self._update_jacobian_by_q()
+        self._update_jacobian_by_t()
+        
+        return
+
+
+    def _calc_Jo_global(self, Jaxs, Jays, Jazs, Jos):
+        """全制御点のヤコビ行列をまとめて計算 (K,3,dof)
+        
+        J = Jax * r_bar[0] + Jay * r_bar[1] + Jaz * r_bar[2] + Jo
+        """
+        D = np.stack([Jaxs, Jays, Jazs, Jos], axis=1)  # (dof+1,4,4,dof)
+        return np.einsum(
+            'kaij,ka->kij', D[self.r_bars_link, :, 0:3, :], self.r_bars_table
+        )
+
+
+    def _update_jacobian_by_q(self,):
+        """各制御点の位置のヤコビ行列を更新"""
+        
+        self.Jos_joint = [Jo[0:3, :] for Jo in self.Jos]  # ジョイント基底のヤコビ行列
+        
+        self.Jos_cpoints_stack = self._calc_Jo_global(
+            self.Jaxs, self.Jays, self.Jazs, self.Jos
+        )  # 制御点位置のヤコビ行列
+        self.Jos_cpoints = nest_by_link(
+            self.Jos_cpoints_stack, self.r_bars_link, len(self.r_bars_all)
+        )
 
         return
 
 
-    def _update_cpoints(self, dq):
-        """制御点の位置と速度を更新
+    def _update_jacobian_cross(self,):
+        """各制御点のヤコビ行列とその時間微分を関節軸と原点の外積から更新
         
-        dq : 関節角速度ベクトル
+        dT/dqの表を作らずに済む．isGeometricJacobian=Trueのとき使用  
+        Jos_cpoints_diff_by_tは角速度の漸化式から求めた解析的な時間微分
         """
         
-        # 制御点の位置を計算
-        self.cpoints_x = []
-        for i, r_bar in enumerate(self.r_bars_all):
-            c_temp = []
-            T_temp = self.Ts_Wo[i+2]
-            for r_bar_ in r_bar:
-                c_temp.append((T_temp.t @ r_bar_)[0:3, :])
-            self.cpoints_x.append(c_temp)
-        
-        # 制御点の速度を計算
-        self.cpoints_dx = []
-        for i in range(len(self.r_bars_all)):
-            _dx = []
-            for Jo in self.Jos_cpoints[i]:
-                _dx.append(Jo @ dq)
-            self.cpoints_dx.append(_dx)
+        nb, n = self.n_base, self.dof
+        zs = np.array([T.t[0:3, 2] for T in self.Ts_Wo[nb:nb+n]])  # 関節軸 (dof,3)
+        origins = np.array([T.t[0:3, 3] for T in self.Ts_Wo[nb:nb+n]])  # 関節原点 (dof,3)
+        
+        # ジョイント（1, 2, ..., n, 手先）
+        joints = np.array([T.t[0:3, 3] for T in self.Ts_Wo[nb:]])
+        mask = np.arange(n)[None, :] <= np.arange(n+1)[:, None]
+        self.Jos_joint = list(cross_jacobian(zs, origins, joints, mask))
+        
+        # 制御点
+        dq = np.ravel(self._dq)
+        cpoints = self.cpoints_x_stack
+        J = cross_jacobian(zs, origins, cpoints, self.cpoints_mask)
+        dx = J @ dq
+        dJ, dJdq = cross_jacobian_dot(
+            zs, origins, cpoints, dx, dq, self.cpoints_mask
+        )
+        
+        self.Jos_cpoints_stack = J  # (K,3,dof)
+        self.dJos_cpoints_stack = dJ  # (K,3,dof)
+        self.dJdq_cpoints_stack = dJdq  # (K,3)
+        
+        link, n = self.r_bars_link, len(self.r_bars_all)
+        self.Jos_cpoints = nest_by_link(J, link, n)
+        self.Jos_cpoints_diff_by_t = nest_by_link(dJ, link, n)
+        
+        return
+
+
+    def _update_jacobian_by_t(self,):
+        """各制御点のヤコビ行列の時間微分？を更新"""
+        
+        self.Jos_cpoints_diff_by_t = nest_by_link(
+            self._calc_Jo_global(
+                self.Jaxs_diff_by_t, self.Jays_diff_by_t, self.Jazs_diff_by_t,
+                self.Jos_diff_by_t
+            ),
+            self.r_bars_link, len(self.r_bars_all)
+        )  # 制御点位置のヤコビ行列
+
+        return
+
+
+    def _update_cpoints(self,):
+        """制御点の位置を更新"""
+        
+        Ts = np.array([T.t[0:3, :] for T in self.Ts_Wo[self.n_base:]])  # (dof+1,3,4)
+        self.cpoints_x_stack = np.einsum(
+            'kij,kj->ki', Ts[self.r_bars_link], self.r_bars_table
+        )  # (K,3)
+        self.cpoints_x = nest_by_link(
+            self.cpoints_x_stack, self.r_bars_link, len(self.r_bars_all)
+        )
+        
+        return
+
+
+    def _update_cpoints_dx(self,):
+        """制御点の速度を更新"""
+        
+        self.cpoints_dx_stack = self.Jos_cpoints_stack @ np.ravel(self._dq)  # (K,3)
+        self.cpoints_dx = nest_by_link(
+            self.cpoints_dx_stack, self.r_bars_link, len(self.r_bars_all)
+        )
         
-        #print(self.cpoints_dx)
         return
 
 
@@ -454,25 +763,331 @@ class BaxterRobotArmKinematics:
 
 
 
+class SerialChainKinematicsInPlace(SerialChainKinematics):
+    """作業領域を使い回すSerialChainKinematics
+    
+    (F+1,4,4)の作業領域を__init__で確保し，update_allではその中身を
+    書き換えるだけなので計算中に配列をほとんど作らない．
+    Ts_Wo, cpoints_x, cpoints_dx, Jos_cpointsは作業領域のビュー．
+    Ts_WoはSerialChainKinematicsと同じくHomogeneousTransformationMatrixのリストで，
+    各要素の.t, .oが作業領域を指すのでupdate_allのたびに作り直さなくても最新になる．
+    ndarray (F,4,4) のままほしいときはTs_Wo_stackを使う．
+    """
+    
+    _lazy_steps = {}  # 全部作業領域にあるので遅延計算はしない
+    _lazy_steps_geometric = {}
+    
+    def __init__(self, spec):
+        """
+        
+        spec : 直列リンクの仕様（load_chain_spec参照）
+        """
+        
+        self._set_spec(spec)
+        
+        K = len(self.r_bars_link)
+        link = self.r_bars_link
+        nb, n = self.n_base, self.dof
+        
+        # 作業領域（Wo，台座，関節，手先）
+        self._W = np.zeros((nb+n+2, 4, 4))
+        self._W[0] = np.eye(4)
+        self._W[1:nb+1] = self.Ts_base_Wo
+        self._joints = slice(nb+1, nb+n+1)  # 作業領域の中の関節
+        
+        # 関節ごとの同次変換行列．角度によらない要素は先に埋めておく
+        self._Ts = dh_transforms(
+            self.DH_alpha, self.DH_a, self.DH_d, np.zeros(n), self._ca, self._sa
+        )
+        self._theta = np.empty(n)
+        self._ct = np.empty(n)
+        self._st = np.empty(n)
+        
+        # 制御点関連
+        self._cpoint_slices = []  # リンクごとの制御点の範囲
+        for i in range(len(self.r_bars_all)):
+            idx = np.flatnonzero(link == i)
+            if idx.size == 0:  # 制御点のないリンク
+                self._cpoint_slices.append(slice(0, 0))
+                continue
+            assert np.all(np.diff(idx) == 1), '制御点はリンクごとに連続して並べること'
+            self._cpoint_slices.append(slice(idx[0], idx[-1]+1))
+        self._r = np.empty((K, n, 3))  # 関節原点から制御点へのベクトル
+        self._skew = np.zeros((n, 3, 3))  # 関節軸の歪対称行列
+        self._J = np.empty((K, n, 3, 1))
+        self._mask = self.cpoints_mask.astype(np.float64)[:, :, None, None]
+        
+        # ヤコビ行列の時間微分用
+        self._dq = np.empty(n)
+        self._w = np.empty((n, 3))  # 角速度
+        self._w_prev = np.zeros((n, 3))  # 一つ前のリンクの角速度
+        self._dz = np.empty((n, 3))  # 関節軸の時間微分
+        self._do = np.empty((n, 3))  # 関節原点の速度
+        self._v3 = np.zeros((n, 3))
+        self._v3_2 = np.empty((n, 3))
+        self._skew_w = np.zeros((n, 3, 3))
+        self._skew_dz = np.zeros((n, 3, 3))
+        self._dr = np.empty((K, n, 3))
+        self._dJ = np.empty((K, n, 3, 1))
+        self._dJ_2 = np.empty((K, n, 3, 1))
+        
+        self.Ts_Wo_stack = self._W[1:]  # Wo基準の同次変換行列 (F,4,4)
+        self.Ts_Wo = [HomogeneousTransformationMatrix(M=T) for T in self.Ts_Wo_stack]
+        self.cpoints_x_stack = np.empty((K, 3))
+        self.cpoints_dx_stack = np.empty((K, 3))
+        self.Jos_cpoints_stack = self._J[..., 0].transpose(0, 2, 1)  # (K,3,dof)
+        self.dJos_cpoints_stack = self._dJ[..., 0].transpose(0, 2, 1)  # (K,3,dof)
+        self.dJdq_cpoints_stack = np.empty((K, 3))
+        
+        # 元のクラスと同じ入れ子リスト（中身はビュー）
+        n_link = len(self.r_bars_all)
+        self.cpoints_x = nest_by_link(self.cpoints_x_stack, link, n_link)
+        self.cpoints_dx = nest_by_link(self.cpoints_dx_stack, link, n_link)
+        self.Jos_cpoints = nest_by_link(self.Jos_cpoints_stack, link, n_link)
+        self.Jos_cpoints_diff_by_t = nest_by_link(self.dJos_cpoints_stack, link, n_link)
+        self.dJdq_cpoints = nest_by_link(self.dJdq_cpoints_stack, link, n_link)
+        
+        self.q = self.q_neutral
+        self.dq = np.zeros((n, 1))
+        
+        self.update_all(self.q, self.dq)
+        
+        return
+    
+    
+    def update_all(self, q, dq, need=None):
+        """全情報を更新
+        
+        need : 計算する出力（KINEMATICS_OUTPUTSの部分集合）．Noneなら全部  
+        含めなかったものの作業領域は前の値のまま
+        """
+        
+        need = expand_need(need)
+        self._dq[:] = np.ravel(dq)
+        
+        self._update_HomogeneousTransformationMatrix(q)
+        self._update_cpoints()
+        if 'jacobians' in need:
+            self._update_jacobian()
+        if 'velocities' in need:
+            np.matmul(self.Jos_cpoints_stack, self._dq, out=self.cpoints_dx_stack)
+        if 'dJ' in need:
+            self._update_jacobian_dot()
+        
+        return
+    
+    
+    def _update_HomogeneousTransformationMatrix(self, q):
+        """同時変換行列を作業領域内で更新"""
+        
+        W, Ts = self._W, self._Ts
+        
+        np.add(np.ravel(q), self.DH_theta, out=self._theta)
+        np.cos(self._theta, out=self._ct)
+        np.sin(self._theta, out=self._st)
+        
+        Ts[:, 0, 0] = self._ct
+        np.negative(self._st, out=Ts[:, 0, 1])
+        np.multiply(self._st, self._ca, out=Ts[:, 1, 0])
+        np.multiply(self._ct, self._ca, out=Ts[:, 1, 1])
+        np.multiply(self._st, self._sa, out=Ts[:, 2, 0])
+        np.multiply(self._ct, self._sa, out=Ts[:, 2, 1])
+        
+        nb, n = self.n_base, self.dof
+        for i in range(n):
+            np.matmul(W[nb+i], Ts[i], out=W[nb+i+1])
+        np.matmul(W[nb+n], self.T_tool, out=W[nb+n+1])
+        
+        return
+    
+    
+    def _update_cpoints(self,):
+        """制御点の位置を更新"""
+        
+        nb = self.n_base
+        for i, sl in enumerate(self._cpoint_slices):
+            np.matmul(
+                self.r_bars_table[sl], self._W[nb+i+1, 0:3, :].T,
+                out=self.cpoints_x_stack[sl]
+            )
+        
+        return
+    
+    
+    def _update_jacobian(self,):
+        """各制御点のヤコビ行列を更新（z_i × (x - o_i)）"""
+        
+        zs = self._W[self._joints, 0:3, 2]
+        origins = self._W[self._joints, 0:3, 3]
+        
+        S = _skew(zs, self._skew)
+        
+        np.subtract(self.cpoints_x_stack[:, None, :], origins[None, :, :], out=self._r)
+        np.matmul(S, self._r[..., None], out=self._J)
+        self._J *= self._mask
+        
+        return
+    
+    
+    def _update_jacobian_dot(self,):
+        """ヤコビ行列の時間微分を角速度の漸化式から更新（cross_jacobian_dotと同じ計算）"""
+        
+        zs = self._W[self._joints, 0:3, 2]
+        origins = self._W[self._joints, 0:3, 3]
+        
+        # 角速度 ω_i と ω_(i-1)
+        np.multiply(zs, self._dq[:, None], out=self._v3)
+        np.cumsum(self._v3, axis=0, out=self._w)
+        self._w_prev[1:] = self._w[:-1]
+        S_w = _skew(self._w_prev, self._skew_w)
+        
+        # 関節軸の時間微分
+        np.matmul(S_w, zs[..., None], out=self._dz[..., None])
+        
+        # 関節原点の速度
+        self._v3[0] = 0
+        np.subtract(origins[1:], origins[:-1], out=self._v3[1:])
+        np.matmul(S_w, self._v3[..., None], out=self._v3_2[..., None])
+        np.cumsum(self._v3_2, axis=0, out=self._do)
+        
+        # dJ_i = dz_i × (x - o_i) + z_i × (dx - do_i)
+        np.matmul(_skew(self._dz, self._skew_dz), self._r[..., None], out=self._dJ)
+        np.subtract(self.cpoints_dx_stack[:, None, :], self._do[None, :, :], out=self._dr)
+        np.matmul(self._skew, self._dr[..., None], out=self._dJ_2)
+        self._dJ += self._dJ_2
+        self._dJ *= self._mask
+        
+        np.matmul(self.dJos_cpoints_stack, self._dq, out=self.dJdq_cpoints_stack)
+        
+        return
+    
+    
+    def get_joint_positions(self,):
+        """ジョイント原点座標を取得（先頭は台座の設置点）"""
+        return [self._W[i, 0:3, 3:4] for i in range(len(self._W))]
+
+
+
+BAXTER_SPEC = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'baxter.yaml'
+)  # Baxterの腕の仕様
+
+
+def baxter_spec(isLeft):
+    """Baxterの左腕か右腕の仕様を読み込む"""
+    return load_chain_spec(BAXTER_SPEC, 'left' if isLeft else 'right')
+
+
+class BaxterRobotArmKinematics(SerialChainKinematics):
+    """Baxterの腕（config/baxter.yamlの仕様のSerialChainKinematics）"""
+    
+    def __init__(self, isLeft, isGeometricJacobian=False):
+        """
+        
+        isLeft : 左手か否か
+        isGeometricJacobian : ヤコビ行列を関節軸と原点の外積から計算するか否か
+        """
+        
+        self.isLeft = isLeft
+        super().__init__(baxter_spec(isLeft), isGeometricJacobian)
+        
+        return
+
+
+class DualArmKinematics:
+    """台座だけが違う2本の腕を胴体座標系（Wo）でまとめて計算する双腕モデル
+    
+    関節角度は (2, dof)（腕の順はspecsの順）で与え，出力は腕の軸 (2, ...) を
+    先頭に持つKinematicsBatchData．両腕の制御点は cpoints_x.reshape(-1, 3) で
+    1つの (2K, 3) の配列として障害物との計算に渡せる
+    """
+    
+    def __init__(self, specs):
+        """
+        
+        specs : 腕ごとの仕様（load_chain_spec参照）のリスト．base以外は同じもの
+        """
+        
+        self.arms = [SerialChainKinematics(spec) for spec in specs]
+        self.chain = self.arms[0]  # 共通の運動学
+        for arm in self.arms[1:]:
+            for name in ('DH_alpha', 'DH_a', 'DH_d', 'DH_theta', 'T_tool', 'r_bars_table', 'r_bars_link'):
+                if not np.array_equal(getattr(arm, name), getattr(self.chain, name)):
+                    raise ValueError('base以外が違う腕はまとめられません : ' + name)
+        
+        self.Ts_base_Wo = np.stack([np.array(arm.Ts_base_Wo) for arm in self.arms])  # (2, n_base, 4, 4)
+        self.q_min = np.stack([np.ravel(arm.q_min) for arm in self.arms])  # (2, dof)
+        self.q_max = np.stack([np.ravel(arm.q_max) for arm in self.arms])
+        
+        self.q = np.stack([np.ravel(arm.q_neutral) for arm in self.arms])  # 関節角度 (2, dof)
+        self.dq = np.zeros_like(self.q)  # 関節角速度 (2, dof)
+        
+        self.update_all(self.q, self.dq, need={'positions'})
+        
+        return
+    
+    
+    def update_all(self, q, dq, need=None):
+        """両腕の全情報を更新
+        
+        q, dq : 関節角度，関節角速度 (2, dof)
+        need : 計算する出力（KINEMATICS_OUTPUTSの部分集合）．Noneなら全部
+        """
+        
+        self.data = self.calc_all_batch(q, dq, need)
+        
+        return self.data
+    
+    
+    def calc_all_batch(self, q, dq=None, need=None):
+        """N組の両腕の関節角度についてまとめて計算
+        
+        q : 関節角度 (..., 2, dof)
+        dq : 関節角速度 (..., 2, dof)．位置だけならNoneでよい
+        need : 計算する出力（KINEMATICS_OUTPUTSの部分集合）．Noneなら全部
+        """
+        
+        if need is None and dq is None:
+            need = {'positions'}
+        
+        q = np.asarray(q, dtype=np.float64)
+        Ts_Wo = self.chain._batch_transforms(q, self.Ts_base_Wo)
+        
+        return self.chain._batch_outputs(Ts_Wo, dq, need)
+
+
+class BaxterDualArmKinematics(DualArmKinematics):
+    """Baxterの両腕（腕の順は左，右）"""
+    
+    def __init__(self,):
+        super().__init__([baxter_spec(True), baxter_spec(False)])
+        return
+
+
+class BaxterRobotArmKinematicsInPlace(SerialChainKinematicsInPlace):
+    """作業領域を使い回すBaxterRobotArmKinematics"""
+    
+    def __init__(self, isLeft):
+        """
+        
+        isLeft : 左手か否か
+        """
+        
+        self.isLeft = isLeft
+        super().__init__(baxter_spec(isLeft))
+        
+        return
+
+
+
 
 
 def main():
     start = time.time()
-    right = BaxterRobotArmKinematics(isLeft=False)
-    os_r = right.get_joint_positions()
-    xrs, yrs, zrs = [], [], []
-    for o in os_r:
-        xrs.append(o[0, 0])
-        yrs.append(o[1, 0])
-        zrs.append(o[2, 0])
-
-    left = BaxterRobotArmKinematics(isLeft=True)
-    os_l = left.get_joint_positions()
-    xls, yls, zls = [], [], []
-    for o in os_l:
-        xls.append(o[0, 0])
-        yls.append(o[1, 0])
-        zls.append(o[2, 0])
+    arms = BaxterDualArmKinematics()
+    data = arms.data  # 左，右の順
+    xls, yls, zls = data.joint_positions[0].T
+    xrs, yrs, zrs = data.joint_positions[1].T
 
 
 
@@ -488,18 +1103,12 @@ def main():
 
 
     cs_name = ("1", "2", "3", "4", "5", "6", "7", "GL")
-    for i, cs in enumerate(right.cpoints_x):
-        cs_ = np.concatenate(cs, axis=1)
-        xs = cs_[0, :].tolist()
-        ys = cs_[1, :].tolist()
-        zs = cs_[2, :].tolist()
-        ax.scatter(xs, ys, zs, label = "R-" + cs_name[i])
-    for i, cs in enumerate(left.cpoints_x):
-        cs_ = np.concatenate(cs, axis=1)
-        xs = cs_[0, :].tolist()
-        ys = cs_[1, :].tolist()
-        zs = cs_[2, :].tolist()
-        ax.scatter(xs, ys, zs, label = "L-" + cs_name[i])
+    for i in range(len(cs_name)):
+        cs = data.cpoints_x[1, data.cpoints_link == i]
+        ax.scatter(cs[:, 0], cs[:, 1], cs[:, 2], label = "R-" + cs_name[i])
+    for i in range(len(cs_name)):
+        cs = data.cpoints_x[0, data.cpoints_link == i]
+        ax.scatter(cs[:, 0], cs[:, 1], cs[:, 2], label = "L-" + cs_name[i])
 
 
     ## 三軸のスケールを揃える
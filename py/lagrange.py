@@ -1,8 +1,8 @@
 
 import numpy as np
 from math import pi, sin, cos, tan
+import time
 
-####バグあり．修正必要
 class BaxterDynamics:
     """バクスターロボットの動力学"""
     
@@ -139,6 +139,8 @@ class BaxterDynamics:
         0.0,
     )
 
+    tau_max = (50.0, 50.0, 50.0, 50.0, 15.0, 15.0, 15.0)  # 関節トルクの上限 [Nm]
+
     Q = np.array([
         [0, -1, 0, 0,],
         [1, 0, 0, 0,],
@@ -148,6 +150,12 @@ class BaxterDynamics:
 
     g = np.array([[0, 0, -9.81, 0]])  # 重力加速度ベクトル（横ベクトル）
 
+    _cache_q = None  # _Tij_cacheを作ったときのq（バイト列）
+    _Tij_cache = None  # (i, j) -> (i-1)T(j)
+    _J_cache = None  # i -> J(i)
+    _newton_euler = None  # linearize用のNewtonEulerDynamics
+    _eye = np.eye(4)
+
     def r_bar(self, i):
         i -= 1
         return np.array([
@@ -175,15 +183,58 @@ class BaxterDynamics:
 
 
     def Tij(self, i, j, q):
-        """同時変換行列"""
-        z = self.Ti(i, q)
-        for k in range(i+1, j+1):
-            z = z @ self.Ti(k, q)
-        return z
+        """同時変換行列 (i-1)T(j)．j < i なら単位行列
+        
+        qごとに全部の(i, j)を作ってキャッシュしておく
+        """
+        if j < i:
+            return self._eye
+        self._update_cache(q)
+        return self._Tij_cache[i, j]
+
+
+    def _update_cache(self, q):
+        """qが変わったときだけ(i-1)T(j)の表を作り直す"""
+        
+        key = np.asarray(q, dtype=np.float64).tobytes()
+        if key == self._cache_q:
+            return
+        
+        Ts = [self.Ti(i, q) for i in range(1, self.n+1)]
+        table = {}
+        for i in range(1, self.n+1):  # 前から掛けていく
+            z = Ts[i-1]
+            table[i, i] = z
+            for j in range(i+1, self.n+1):
+                z = z @ Ts[j-1]
+                table[i, j] = z
+        
+        self._Tij_cache = table
+        self._cache_q = key
+        
+        return
+
+
+    def clear_cache(self,):
+        """キャッシュを捨てる（パラメータを変えたとき用）"""
+        self._cache_q = None
+        self._Tij_cache = None
+        self._J_cache = None
+        self._newton_euler = None
+        return
 
 
     def J(self, i):
-        """慣性モーメント"""
+        """慣性モーメント（擬似慣性行列）．定数なので一度作ったら使い回す"""
+        if self._J_cache is None:
+            self._J_cache = {}
+        if i not in self._J_cache:
+            self._J_cache[i] = self._calc_J(i)
+        return self._J_cache[i]
+
+
+    def _calc_J(self, i):
+        """擬似慣性行列を作成"""
         i -= 1
         return np.array([
             [(-self.Ixx[i]+self.Iyy[i]+self.Izz[i])/2, self.Ixy[i], self.Ixz[i], self.m[i]*self.x_bar[i],],
@@ -229,7 +280,7 @@ class BaxterDynamics:
         j_start = max(i, k, m)
         z = 0
         for j in range(j_start, self.n+1):
-            z += np.trace(self.Uijk(j, k, m, q) @ self.J(i-1) @ self.Uij(j, i, q).T)
+            z += np.trace(self.Uijk(j, k, m, q) @ self.J(j) @ self.Uij(j, i, q).T)
         
         return z
 
@@ -279,6 +330,67 @@ class BaxterDynamics:
         return z
 
 
+    ### ∂M/∂qとクリストッフェル記号によるコリオリ項 ###
+    def U_tensor(self, q):
+        """U[j-1, i-1] = Uij(j, i) (n, n, 4, 4)"""
+        z = np.zeros((self.n, self.n, 4, 4))
+        for j in range(1, self.n+1):
+            for i in range(1, j+1):
+                z[j-1, i-1] = self.Uij(j, i, q)
+        return z
+
+
+    def Uijk_tensor(self, q):
+        """U[j-1, k-1, m-1] = Uijk(j, k, m) (n, n, n, 4, 4)．k, mについて対称"""
+        z = np.zeros((self.n, self.n, self.n, 4, 4))
+        for j in range(1, self.n+1):
+            for k in range(1, j+1):
+                for m in range(1, k+1):
+                    z[j-1, k-1, m-1] = self.Uijk(j, k, m, q)
+                    z[j-1, m-1, k-1] = z[j-1, k-1, m-1]
+        return z
+
+
+    def J_tensor(self,):
+        """J[j-1] = J(j) (n, 4, 4)"""
+        return np.array([self.J(j) for j in range(1, self.n+1)])
+
+
+    def dM_dq(self, q):
+        """慣性行列の偏微分 dM[i, k, m] = ∂M_ik/∂q_m (n, n, n)
+        
+        ∂M_ik/∂q_m = Σ_j tr(U_jkm J_j U_ji^T) + tr(U_jk J_j U_jim^T)  
+        2項目は1項目のiとkを入れ替えたもの
+        """
+        U = self.U_tensor(q)
+        U2 = self.Uijk_tensor(q)
+        Js = self.J_tensor()
+        z = np.einsum('jkmab,jbc,jiac->ikm', U2, Js, U, optimize=True)
+        return z + z.transpose(1, 0, 2)
+
+
+    def coriolis_matrix(self, q, dq, dM=None):
+        """コリオリ行列 C(q, dq) (n, n)．C(q, dq) @ dq がコリオリ・遠心力項
+        
+        C_ij = Σ_k c_ijk dq_k，c_ijk = (∂M_ij/∂q_k + ∂M_ik/∂q_j - ∂M_jk/∂q_i) / 2  
+        dM - 2C は歪対称になる  
+        dM : 計算済みのdM_dq(q)．Noneならここで計算
+        """
+        if dM is None:
+            dM = self.dM_dq(q)
+        dq = np.ravel(dq)
+        return 0.5 * (
+            np.einsum('ijk,k->ij', dM, dq)
+            + np.einsum('ikj,k->ij', dM, dq)
+            - np.einsum('jki,k->ij', dM, dq)
+        )
+
+
+    def C_christoffel(self, q, dq):
+        """コリオリ・遠心力項 (n, 1)（Cと同じ値をdM_dqから計算）"""
+        return self.coriolis_matrix(q, dq) @ np.reshape(dq, (self.n, 1))
+
+
     def calc_torque(self, q, dq, ddq):
         """トルクを計算
         
@@ -302,6 +414,22 @@ class BaxterDynamics:
         return np.linalg.inv(self.M(q)) @ (u + F - (self.C(q, dq) + self.G(q)))
 
 
+    def linearize(self, q, dq, u, F=None):
+        """N個の動作点で運動方程式を線形化（MPC，LQR用）
+        
+        状態 x = (q, dq) として d(δx)/dt = A δx + B δu  
+        ニュートン・オイラー法の逆動力学の偏微分を使う（newton_euler.linearize_batch）  
+        q, dq : 関節角度，角速度 (N, 7)  
+        u : トルク (N, 7)  
+        F : 外力 (N, 7)．Noneなら0  
+        戻り値 : A (N, 14, 14), B (N, 14, 7)
+        """
+        if self._newton_euler is None:
+            from newton_euler import NewtonEulerDynamics  # 相互importになるのでここで
+            self._newton_euler = NewtonEulerDynamics(self)
+        return self._newton_euler.linearize_batch(q, dq, u, F)
+
+
 
 
 """テスト用"""
@@ -324,6 +452,27 @@ def _test():
     #print(d.M(q))
     
     u = d.calc_torque(q, dq, ddq)
+    
+    # クリストッフェル記号によるコリオリ項
+    dq = np.random.default_rng(0).normal(size=(7, 1))
+    start = time.time()
+    C1 = d.C(q, dq)
+    t1 = time.time() - start
+    start = time.time()
+    C2 = d.C_christoffel(q, dq)
+    t2 = time.time() - start
+    print("コリオリ項の差 ", np.abs(C1 - C2).max(), " 計算時間 ", t1, t2)
+    
+    e = 1e-6
+    dM = d.dM_dq(q)
+    dM_num = (d.M(q + e*dq) - d.M(q - e*dq)) / (2*e)
+    Cm = d.coriolis_matrix(q, dq, dM)
+    print("dM/dtの差 ", np.abs(dM @ np.ravel(dq) - dM_num).max())
+    print("dM/dt - 2Cの歪対称性 ", np.abs((dM_num - 2*Cm) + (dM_num - 2*Cm).T).max())
+    
+    # 線形化のBの下半分はM^-1
+    A, B = d.linearize(q.T, dq.T, u.T)
+    print("線形化 A", A.shape, "B", B.shape, " M^-1との差 ", np.abs(B[0, 7:14] - np.linalg.inv(d.M(q))).max())
     #print(u)
     #F = np.zeros((7, 1))
     #r_ddq = d.calc_real_ddq(u, F, q, dq)
@@ -0,0 +1,659 @@
+"""ニュートン・オイラー法による動力学（空間ベクトル）
+
+lagrange.BaxterDynamicsと同じDHパラメータ（標準DH法）と慣性パラメータを使う．
+リンクiの座標系は関節iの回転 Rz(q_i) の直後の座標系 i' にとる．
+こうすると関節の運動部分空間は S = [0, 0, 1, 0, 0, 0]（角速度のz）で一定になる．
+(i-1)' から i' への変換は F_(i-1) Rz(q_i)，F_i = Tz(d_i) Tx(a_i) Rx(alpha_i)．
+空間ベクトルは [角, 並進] の順（Featherstone）．
+"""
+
+import numpy as np
+from math import pi, sin, cos
+import time
+
+from lagrange import BaxterDynamics
+
+
+def skew(v):
+    """歪対称行列 v×"""
+    return np.array([
+        [0, -v[2], v[1]],
+        [v[2], 0, -v[0]],
+        [-v[1], v[0], 0],
+    ])
+
+
+def crm(v):
+    """運動ベクトルの外積 v×"""
+    z = np.zeros((6, 6))
+    z[0:3, 0:3] = skew(v[0:3])
+    z[3:6, 3:6] = z[0:3, 0:3]
+    z[3:6, 0:3] = skew(v[3:6])
+    return z
+
+
+def crf(v):
+    """力ベクトルの外積 v×*"""
+    return -crm(v).T
+
+
+def plucker(T):
+    """同次変換行列 T（Aから見たBの位置姿勢）からAからBへの座標変換 (6,6)"""
+    E = T[0:3, 0:3].T
+    z = np.zeros((6, 6))
+    z[0:3, 0:3] = E
+    z[3:6, 3:6] = E
+    z[3:6, 0:3] = -E @ skew(T[0:3, 3])
+    return z
+
+
+def rot_z(q):
+    """Rz(q)の座標変換 (6,6)"""
+    c, s = cos(q), sin(q)
+    E = np.array([
+        [c, s, 0],
+        [-s, c, 0],
+        [0, 0, 1],
+    ])
+    z = np.zeros((6, 6))
+    z[0:3, 0:3] = E
+    z[3:6, 3:6] = E
+    return z
+
+
+def _cross(a, b):
+    """3次元ベクトルの外積をまとめて計算 (..., 3)（np.crossより速い）"""
+    a0, a1, a2 = a[..., 0], a[..., 1], a[..., 2]
+    b0, b1, b2 = b[..., 0], b[..., 1], b[..., 2]
+    return np.stack([a1*b2 - a2*b1, a2*b0 - a0*b2, a0*b1 - a1*b0], axis=-1)
+
+
+def cross_motion(v, m):
+    """運動ベクトルの外積 v×m をまとめて計算 (..., 6)"""
+    w = v[..., 0:3]
+    return np.concatenate([
+        _cross(w, m[..., 0:3]),
+        _cross(w, m[..., 3:6]) + _cross(v[..., 3:6], m[..., 0:3]),
+    ], axis=-1)
+
+
+def cross_force(v, f):
+    """力ベクトルの外積 v×*f をまとめて計算 (..., 6)"""
+    w = v[..., 0:3]
+    return np.concatenate([
+        _cross(w, f[..., 0:3]) + _cross(v[..., 3:6], f[..., 3:6]),
+        _cross(w, f[..., 3:6]),
+    ], axis=-1)
+
+
+def crf_batch(v):
+    """力ベクトルの外積 v×* の行列をまとめて作る (..., 6, 6)"""
+    z = np.zeros(np.shape(v)[:-1] + (6, 6))
+    for k, l in ((0, 0), (3, 3), (0, 3)):  # crf = [[w×, u×], [0, w×]]
+        x = v[..., l:l+3] if (k, l) == (0, 3) else v[..., 0:3]
+        z[..., k, l+1] = -x[..., 2]
+        z[..., k, l+2] = x[..., 1]
+        z[..., k+1, l] = x[..., 2]
+        z[..., k+1, l+2] = -x[..., 0]
+        z[..., k+2, l] = -x[..., 1]
+        z[..., k+2, l+1] = x[..., 0]
+    return z
+
+
+def rot_z_batch(q):
+    """Rz(q)の座標変換をまとめて計算 (..., 6, 6)"""
+    c, s = np.cos(q), np.sin(q)
+    z = np.zeros(np.shape(q) + (6, 6))
+    for k in (0, 3):
+        z[..., k, k] = c
+        z[..., k, k+1] = s
+        z[..., k+1, k] = -s
+        z[..., k+1, k+1] = c
+        z[..., k+2, k+2] = 1
+    return z
+
+
+def spatial_inertia(J):
+    """擬似慣性行列 J = ∫ r_bar r_bar^T dm (4,4) から空間慣性 (6,6)"""
+    Sigma = J[0:3, 0:3]
+    h = J[0:3, 3]  # m * 重心
+    m = J[3, 3]
+    z = np.zeros((6, 6))
+    z[0:3, 0:3] = np.trace(Sigma) * np.eye(3) - Sigma
+    z[0:3, 3:6] = skew(h)
+    z[3:6, 0:3] = skew(h).T
+    z[3:6, 3:6] = m * np.eye(3)
+    return z
+
+
+def pseudo_inertia(p):
+    """慣性パラメータ p = [m, m x, m y, m z, Ixx, Iyy, Izz, Ixy, Iyz, Ixz] から擬似慣性行列 (4,4)
+
+    BaxterDynamics.Jと同じ形（pについて線形）
+    """
+    m, mx, my, mz, Ixx, Iyy, Izz, Ixy, Iyz, Ixz = p
+    return np.array([
+        [(-Ixx+Iyy+Izz)/2, Ixy, Ixz, mx],
+        [Ixy, (Ixx-Iyy+Izz)/2, Iyz, my],
+        [Ixz, Iyz, (Ixx+Iyy-Izz)/2, mz],
+        [mx, my, mz, m],
+    ])
+
+
+class TorqueReport:
+    """軌道全体のトルクとアクチュエータ制限のまとめ
+
+    tau : トルク (T, n)
+    tau_max : トルクの上限 (n,)
+    peak : 絶対値の最大 (n,)
+    rms : 二乗平均平方根 (n,)
+    violations : 上限を超えたか否か (T, n)
+    n_violations : 上限を超えたフレーム数 (n,)
+    peak_ratio : peak / tau_max (n,)
+    """
+
+    def __init__(self, tau, tau_max):
+        self.tau = tau
+        self.tau_max = np.asarray(tau_max, dtype=np.float64)
+        abs_tau = np.abs(tau)
+        self.peak = abs_tau.max(axis=0)
+        self.rms = np.sqrt(np.mean(tau**2, axis=0))
+        self.violations = abs_tau > self.tau_max
+        self.n_violations = self.violations.sum(axis=0)
+        self.peak_ratio = self.peak / self.tau_max
+        return
+
+
+    def summary(self,):
+        """表にして文字列で返す"""
+        lines = ['joint   peak[Nm]    rms[Nm]  limit[Nm]  peak/limit  violations']
+        for i in range(len(self.peak)):
+            lines.append('{:5d} {:10.3f} {:10.3f} {:10.1f} {:11.3f} {:11d}'.format(
+                i+1, self.peak[i], self.rms[i], self.tau_max[i],
+                self.peak_ratio[i], self.n_violations[i]
+            ))
+        return '\n'.join(lines)
+
+
+class NewtonEulerDynamics:
+    """ニュートン・オイラー法による動力学"""
+
+    S = np.array([0, 0, 1, 0, 0, 0], dtype=np.float64)  # 関節の運動部分空間
+
+    def __init__(self, model=None):
+        """
+
+        model : DHパラメータと慣性パラメータを持つもの．NoneならBaxterDynamics()
+        """
+
+        if model is None:
+            model = BaxterDynamics()
+        self.model = model
+        self.n = model.n
+
+        # F_i = Tz(d_i) Tx(a_i) Rx(alpha_i)
+        self.F = []
+        for i in range(self.n):
+            ca, sa = cos(model.alpha[i]), sin(model.alpha[i])
+            self.F.append(np.array([
+                [1, 0, 0, model.a[i]],
+                [0, ca, -sa, 0],
+                [0, sa, ca, model.d[i]],
+                [0, 0, 0, 1],
+            ]))
+
+        # 親から子への変換のうち関節角度によらない部分 X(F_(i-1))
+        self.X_tree = [np.eye(6)]
+        for i in range(1, self.n):
+            self.X_tree.append(plucker(self.F[i-1]))
+
+        # i'座標系での空間慣性（擬似慣性行列を F J F^T で移す）
+        self.I = [
+            spatial_inertia(self.F[i] @ model.J(i+1) @ self.F[i].T)
+            for i in range(self.n)
+        ]
+
+        # 慣性パラメータの単位ベクトルごとの空間慣性 (n, 10, 6, 6)（リグレッサ用）
+        self.I_basis = np.array([
+            [spatial_inertia(self.F[i] @ pseudo_inertia(e) @ self.F[i].T) for e in np.eye(10)]
+            for i in range(self.n)
+        ])
+
+        # 重力の代わりに台座を上向きに加速させる
+        self.a_base = np.zeros(6)
+        self.a_base[3:6] = -np.ravel(model.g)[0:3]
+
+        return
+
+
+    def _X_up(self, q):
+        """親から子への座標変換のリスト"""
+        return [rot_z(q[i]) @ self.X_tree[i] for i in range(self.n)]
+
+
+    def inverse_dynamics(self, q, dq, ddq, gravity=True):
+        """逆動力学（RNEA）．τ = M(q) ddq + C(q, dq) + G(q)
+
+        q, dq, ddq : 関節角度，角速度，角加速度 (7,1) か (7,)
+        gravity : 重力を含めるか否か
+        戻り値 : トルク (7,1)
+        """
+
+        q, dq, ddq = np.ravel(q), np.ravel(dq), np.ravel(ddq)
+        S = self.S
+        X_up = self._X_up(q)
+
+        v = np.zeros(6)
+        a = self.a_base if gravity else np.zeros(6)
+        f = []
+        for i in range(self.n):
+            vJ = S * dq[i]
+            v = X_up[i] @ v + vJ
+            a = X_up[i] @ a + S * ddq[i] + crm(v) @ vJ
+            f.append(self.I[i] @ a + crf(v) @ self.I[i] @ v)
+
+        tau = np.zeros((self.n, 1))
+        for i in reversed(range(self.n)):
+            tau[i, 0] = S @ f[i]
+            if i > 0:
+                f[i-1] = f[i-1] + X_up[i].T @ f[i]
+
+        return tau
+
+
+    def inverse_dynamics_batch(self, q, dq, ddq, gravity=True):
+        """T組の状態の逆動力学（RNEA）をまとめて計算
+
+        q, dq, ddq : 関節角度，角速度，角加速度 (T, n)
+        gravity : 重力を含めるか否か
+        戻り値 : トルク (T, n)
+        """
+
+        q = np.atleast_2d(q)
+        dq = np.atleast_2d(dq)
+        ddq = np.atleast_2d(ddq)
+        T = q.shape[0]
+        S = self.S
+
+        X_up = rot_z_batch(q) @ np.array(self.X_tree)
+
+        v = np.zeros((T, 6))
+        a = np.tile(self.a_base if gravity else np.zeros(6), (T, 1))
+        f = np.empty((T, self.n, 6))
+        for i in range(self.n):
+            vJ = dq[:, i, None] * S
+            v = np.einsum('tab,tb->ta', X_up[:, i], v) + vJ
+            a = np.einsum('tab,tb->ta', X_up[:, i], a) + ddq[:, i, None] * S + cross_motion(v, vJ)
+            f[:, i] = a @ self.I[i].T + cross_force(v, v @ self.I[i].T)
+
+        tau = np.empty((T, self.n))
+        for i in reversed(range(self.n)):
+            tau[:, i] = f[:, i, 2]  # S^T f
+            if i > 0:
+                f[:, i-1] += np.einsum('tba,tb->ta', X_up[:, i], f[:, i])
+
+        return tau
+
+
+    def inverse_dynamics_derivatives_batch(self, q, dq, ddq):
+        """逆動力学とその関節角度，角速度についての偏微分をまとめて計算
+
+        RNEAの各量と一緒に，2n個の変数 (q, dq) についての偏微分を前向きに運ぶ．
+        dRz(q_i)/dq_i = -S× Rz(q_i) を使う
+
+        q, dq, ddq : 関節角度，角速度，角加速度 (N, n)
+        戻り値 : トルク (N, n), ∂τ/∂q (N, n, n), ∂τ/∂dq (N, n, n)．[k, i, j] = ∂τ_i/∂x_j
+        """
+
+        q = np.atleast_2d(q)
+        dq = np.atleast_2d(dq)
+        ddq = np.atleast_2d(ddq)
+        N, n = q.shape
+        S = self.S
+
+        X_up = rot_z_batch(q) @ np.array(self.X_tree)
+
+        v = np.zeros((N, 6))
+        a = np.tile(self.a_base, (N, 1))
+        Dv = np.zeros((N, 2*n, 6))  # Dv[:, j] = ∂v/∂x_j，x = (q, dq)
+        Da = np.zeros((N, 2*n, 6))
+        f = np.empty((N, n, 6))
+        Df = np.empty((N, n, 2*n, 6))
+        for i in range(n):
+            X = X_up[:, i]
+            Xv = np.einsum('tab,tb->ta', X, v)
+            Xa = np.einsum('tab,tb->ta', X, a)
+            vJ = dq[:, i, None] * S
+            v = Xv + vJ
+            a = Xa + ddq[:, i, None] * S + cross_motion(v, vJ)
+
+            Dv = np.einsum('tab,tjb->tja', X, Dv)
+            Da = np.einsum('tab,tjb->tja', X, Da)
+            Dv[:, i] -= cross_motion(S, Xv)
+            Da[:, i] -= cross_motion(S, Xa)
+            Dv[:, n+i] += S
+            Da += cross_motion(Dv, vJ[:, None, :])
+            Da[:, n+i] += cross_motion(v, S)
+
+            Iv = v @ self.I[i].T
+            f[:, i] = a @ self.I[i].T + cross_force(v, Iv)
+            Df[:, i] = (
+                Da @ self.I[i].T
+                + cross_force(Dv, Iv[:, None, :])
+                + cross_force(v[:, None, :], Dv @ self.I[i].T)
+            )
+
+        tau = np.empty((N, n))
+        Dtau = np.empty((N, n, 2*n))
+        for i in reversed(range(n)):
+            tau[:, i] = f[:, i, 2]  # S^T f
+            Dtau[:, i] = Df[:, i, :, 2]
+            if i > 0:
+                X = X_up[:, i]
+                f[:, i-1] += np.einsum('tba,tb->ta', X, f[:, i])
+                Df[:, i-1] += np.einsum('tba,tjb->tja', X, Df[:, i])
+                # (dX/dq_i)^T f = X^T (S×* f)
+                Df[:, i-1, i] += np.einsum('tba,tb->ta', X, cross_force(S, f[:, i]))
+
+        return tau, Dtau[:, :, 0:n], Dtau[:, :, n:2*n]
+
+
+    def M_batch(self, q):
+        """N組の関節角度の慣性行列（CRBA）をまとめて計算 (N, n, n)"""
+
+        q = np.atleast_2d(q)
+        N, n = q.shape
+        X_up = rot_z_batch(q) @ np.array(self.X_tree)
+
+        Ic = np.tile(np.array(self.I), (N, 1, 1, 1))
+        for i in reversed(range(1, n)):
+            Ic[:, i-1] += X_up[:, i].transpose(0, 2, 1) @ Ic[:, i] @ X_up[:, i]
+
+        z = np.zeros((N, n, n))
+        for i in range(n):
+            F = Ic[:, i, :, 2]
+            z[:, i, i] = F[:, 2]
+            for j in reversed(range(i)):
+                F = np.einsum('tba,tb->ta', X_up[:, j+1], F)
+                z[:, i, j] = z[:, j, i] = F[:, 2]
+
+        return z
+
+
+    def linearize_batch(self, q, dq, tau, F_ext=None):
+        """状態 x = (q, dq) の運動方程式 dx/dt = (dq, ddq(q, dq, τ)) をN点でまとめて線形化
+
+        ddq = M^-1 (τ + F - C - G) なので，逆動力学IDの偏微分を使って
+        ∂ddq/∂q = -M^-1 ∂ID/∂q, ∂ddq/∂dq = -M^-1 ∂ID/∂dq, ∂ddq/∂τ = M^-1
+
+        q, dq : 関節角度，角速度 (N, n)
+        tau : トルク (N, n)
+        F_ext : 関節空間の外力 (N, n)．Noneなら0
+        戻り値 : A (N, 2n, 2n), B (N, 2n, n)
+        """
+
+        q = np.atleast_2d(q)
+        dq = np.atleast_2d(dq)
+        u = np.atleast_2d(np.array(tau, dtype=np.float64))
+        if F_ext is not None:
+            u = u + F_ext
+        N, n = q.shape
+
+        M = self.M_batch(q)
+        bias = self.inverse_dynamics_batch(q, dq, np.zeros_like(q))
+        ddq = np.linalg.solve(M, (u - bias)[:, :, None])[:, :, 0]
+
+        _, dtau_dq, dtau_ddq = self.inverse_dynamics_derivatives_batch(q, dq, ddq)
+        rhs = np.concatenate([-dtau_dq, -dtau_ddq, np.broadcast_to(np.eye(n), (N, n, n))], axis=2)
+        z = np.linalg.solve(M, rhs)  # M^-1 [-∂ID/∂q, -∂ID/∂dq, I]
+
+        A = np.zeros((N, 2*n, 2*n))
+        A[:, 0:n, n:2*n] = np.eye(n)
+        A[:, n:2*n] = z[:, :, 0:2*n]
+        B = np.zeros((N, 2*n, n))
+        B[:, n:2*n] = z[:, :, 2*n:3*n]
+
+        return A, B
+
+
+    def regressor_batch(self, q, dq, ddq, gravity=True):
+        """N組の状態のリグレッサ Y (N, n, 10n)．τ = Y π
+
+        π はリンクごとの慣性パラメータ（pseudo_inertiaの並び）をつなげたもの．
+        リンクiの力 f_i = I_i a_i + v_i×* I_i v_i は空間慣性I_iについて線形なので，
+        単位パラメータごとの力 (10, 6) を作り，関節jの軸をi'座標系で見たもの s との
+        内積 s・f_i を関節jのトルクへの寄与とする
+
+        q, dq, ddq : 関節角度，角速度，角加速度 (N, n)
+        gravity : 重力を含めるか否か
+        """
+
+        q = np.atleast_2d(q)
+        dq = np.atleast_2d(dq)
+        ddq = np.atleast_2d(ddq)
+        N, n = q.shape
+        S = self.S
+
+        X_up = rot_z_batch(q) @ np.array(self.X_tree)
+
+        v = np.zeros((N, 6, 1))
+        a = np.tile(self.a_base if gravity else np.zeros(6), (N, 1))[:, :, None]
+        axes = np.zeros((N, 0, 6))  # 関節0~iの軸をi'座標系で見たもの
+        Y = np.zeros((N, n, n, 10))
+        for i in range(n):
+            vJ = dq[:, i, None] * S
+            v = X_up[:, i] @ v
+            v[:, :, 0] += vJ
+            a = X_up[:, i] @ a
+            a[:, :, 0] += ddq[:, i, None] * S + cross_motion(v[:, :, 0], vJ)
+
+            axes = np.concatenate(
+                [axes @ X_up[:, i].transpose(0, 2, 1), np.tile(S, (N, 1, 1))], axis=1
+            )
+
+            # 単位パラメータごとのリンクiの力 (N, 10, 6)
+            B = self.I_basis[i].transpose(2, 0, 1).reshape(6, 60)
+            Iv = (v[:, :, 0] @ B).reshape(N, 10, 6)
+            W = (a[:, :, 0] @ B).reshape(N, 10, 6) + Iv @ crf_batch(v[:, :, 0]).transpose(0, 2, 1)
+            Y[:, 0:i+1, i] = axes @ W.transpose(0, 2, 1)
+
+        return Y.reshape(N, n, 10*n)
+
+
+    def torque_report(self, q, dq, ddq, tau_max=None):
+        """軌道全体のトルクを計算して上限と比べる
+
+        q, dq, ddq : 関節角度，角速度，角加速度 (T, n)
+        tau_max : トルクの上限 (n,)．Noneならmodel.tau_max
+        """
+        if tau_max is None:
+            tau_max = self.model.tau_max
+        return TorqueReport(self.inverse_dynamics_batch(q, dq, ddq), tau_max)
+
+
+    def M(self, q):
+        """慣性行列（CRBA）
+
+        先端から根元へ複合剛体の慣性を足していき，対称性を使って下三角だけ計算する
+        """
+
+        q = np.ravel(q)
+        X_up = self._X_up(q)
+
+        Ic = [I.copy() for I in self.I]  # 複合剛体の空間慣性
+        for i in reversed(range(1, self.n)):
+            Ic[i-1] += X_up[i].T @ Ic[i] @ X_up[i]
+
+        z = np.zeros((self.n, self.n))
+        for i in range(self.n):
+            F = Ic[i][:, 2]  # Ic @ S
+            z[i, i] = F[2]
+            for j in reversed(range(i)):
+                F = X_up[j+1].T @ F
+                z[i, j] = z[j, i] = F[2]  # S^T F
+
+        return z
+
+
+    def C(self, q, dq):
+        """コリオリ・遠心力項 (7,1)"""
+        return self.inverse_dynamics(q, dq, np.zeros(self.n), gravity=False)
+
+
+    def G(self, q):
+        """重力項 (7,1)"""
+        return self.inverse_dynamics(q, np.zeros(self.n), np.zeros(self.n))
+
+
+    def calc_torque(self, q, dq, ddq):
+        """トルクを計算（BaxterDynamics.calc_torqueと同じ）"""
+        return self.inverse_dynamics(q, dq, ddq)
+
+
+    def forward_dynamics(self, q, dq, tau, F_ext=None):
+        """順動力学（ABA）．慣性行列を作らずに関節角加速度を計算
+
+        q, dq : 関節角度，角速度 (7,1) か (7,)
+        tau : トルク (7,1) か (7,)
+        F_ext : 関節空間の外力 (7,1) か (7,)．Noneなら0
+        戻り値 : 関節角加速度 (7,1)
+        """
+
+        q, dq = np.ravel(q), np.ravel(dq)
+        u = np.array(np.ravel(tau), dtype=np.float64)
+        if F_ext is not None:
+            u = u + np.ravel(F_ext)
+        X_up = self._X_up(q)
+
+        # 速度と速度積の項
+        v = np.zeros(6)
+        c, IA, pA = [], [], []
+        for i in range(self.n):
+            vJ = self.S * dq[i]
+            v = X_up[i] @ v + vJ
+            c.append(crm(v) @ vJ)
+            IA.append(self.I[i].copy())
+            pA.append(crf(v) @ self.I[i] @ v)
+
+        # 先端から関節を1つずつ畳み込んだ慣性（articulated body inertia）
+        U, D = [None] * self.n, np.zeros(self.n)
+        for i in reversed(range(self.n)):
+            U[i] = IA[i][:, 2]  # IA @ S
+            D[i] = U[i][2]
+            u[i] -= pA[i][2]
+            if i > 0:
+                Ia = IA[i] - np.outer(U[i], U[i]) / D[i]
+                pa = pA[i] + Ia @ c[i] + U[i] * u[i] / D[i]
+                IA[i-1] += X_up[i].T @ Ia @ X_up[i]
+                pA[i-1] += X_up[i].T @ pa
+
+        ddq = np.zeros((self.n, 1))
+        a = self.a_base
+        for i in range(self.n):
+            a = X_up[i] @ a + c[i]
+            ddq[i, 0] = (u[i] - U[i] @ a) / D[i]
+            a = a + self.S * ddq[i, 0]
+
+        return ddq
+
+
+    def calc_real_ddq(self, u, F, q, dq):
+        """現実世界での加速度（BaxterDynamics.calc_real_ddqと同じ引数）"""
+        return self.forward_dynamics(q, dq, u, F)
+
+
+
+def _test():
+    lag = BaxterDynamics()
+    ne = NewtonEulerDynamics(lag)
+    rng = np.random.default_rng(0)
+
+    err = 0
+    for _ in range(5):
+        q = rng.uniform(-pi, pi, (7, 1))
+        dq = rng.normal(size=(7, 1))
+        ddq = rng.normal(size=(7, 1))
+        tau_lag = lag.calc_torque(q, dq, ddq)
+        tau_ne = ne.calc_torque(q, dq, ddq)
+        err = max(err, np.abs(tau_lag - tau_ne).max() / np.abs(tau_lag).max())
+    print("ラグランジュ法との相対誤差 ", err)
+    assert err < 1e-10
+
+    M_lag = lag.M(q)
+    M_crba = ne.M(q)
+    err_M = np.abs(M_lag - M_crba).max() / np.abs(M_lag).max()
+    print("慣性行列（CRBA）の相対誤差 ", err_M)
+    assert err_M < 1e-10
+
+    tau = rng.normal(size=(7, 1))
+    F = rng.normal(size=(7, 1))
+    ddq_lag = lag.calc_real_ddq(tau, F, q, dq)
+    ddq_aba = ne.forward_dynamics(q, dq, tau, F)
+    err_ddq = np.abs(ddq_lag - ddq_aba).max() / np.abs(ddq_lag).max()
+    print("順動力学（ABA）の相対誤差 ", err_ddq)
+    assert err_ddq < 1e-8
+
+    start = time.time()
+    for _ in range(3):
+        lag.calc_torque(q, dq, ddq)
+    t_lag = (time.time() - start) / 3
+    start = time.time()
+    for _ in range(1000):
+        ne.calc_torque(q, dq, ddq)
+    t_ne = (time.time() - start) / 1000
+    print("計算時間 ラグランジュ法 ", t_lag, " ニュートン・オイラー法 ", t_ne)
+
+    start = time.time()
+    lag.M(q)
+    t_lag = time.time() - start
+    start = time.time()
+    for _ in range(1000):
+        ne.M(q)
+    t_ne = (time.time() - start) / 1000
+    print("慣性行列の計算時間 ラグランジュ法 ", t_lag, " CRBA ", t_ne)
+
+    start = time.time()
+    for _ in range(1000):
+        ne.forward_dynamics(q, dq, tau, F)
+    print("順動力学（ABA）の計算時間 ", (time.time() - start) / 1000)
+
+    # 軌道全体をまとめて計算
+    T = 6000
+    qs = rng.uniform(-pi, pi, (T, 7))
+    dqs = rng.normal(size=(T, 7))
+    ddqs = rng.normal(size=(T, 7))
+    start = time.time()
+    report = ne.torque_report(qs, dqs, ddqs)
+    t_batch = time.time() - start
+    err_batch = max(
+        np.abs(report.tau[k] - np.ravel(ne.inverse_dynamics(qs[k], dqs[k], ddqs[k]))).max()
+        for k in range(0, T, 500)
+    )
+    print("まとめて計算したトルクの差 ", err_batch, " 計算時間 ", t_batch, "（", T, "フレーム）")
+    assert err_batch < 1e-10
+    print(report.summary())
+
+    # 線形化を順動力学の中心差分と比べる
+    N = 200
+    qs, dqs = qs[0:N], dqs[0:N]
+    taus = rng.normal(scale=10, size=(N, 7))
+    start = time.time()
+    A, B = ne.linearize_batch(qs, dqs, taus)
+    t_lin = time.time() - start
+    k = 3
+    x = np.concatenate([qs[k], dqs[k]])
+    e = 1e-6
+    def _f(x, tau):
+        return np.ravel(ne.forward_dynamics(x[0:7], x[7:14], tau))
+    A_num = np.array([(_f(x + e*d, taus[k]) - _f(x - e*d, taus[k])) / (2*e) for d in np.eye(14)]).T
+    B_num = np.array([(_f(x, taus[k] + e*d) - _f(x, taus[k] - e*d)) / (2*e) for d in np.eye(7)]).T
+    err_A = np.abs(A[k, 7:14] - A_num).max() / np.abs(A_num).max()
+    err_B = np.abs(B[k, 7:14] - B_num).max() / np.abs(B_num).max()
+    print("線形化の相対誤差 A ", err_A, " B ", err_B, " 計算時間 ", t_lin, "（", N, "点）")
+    assert err_A < 1e-6 and err_B < 1e-6
+
+    return
+
+
+if __name__ == "__main__":
+    _test()
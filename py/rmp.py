@@ -15,10 +15,16 @@ class RMP:
 
 
 
-def pullback(f, M, J, dJ=None, dx= None):
-    """pullback演算"""
+def pullback(f, M, J, dJ=None, dx= None, dJdx=None):
+    """pullback演算
     
-    if dJ is None and dx is None:
+    dJdx : dJ @ dx（曲率項）．計算済みならdJ, dxの代わりに渡す
+    """
+    
+    if dJdx is not None:
+        _f = J.T @ (f - M @ dJdx)
+        _M = J.T @ M @ J
+    elif dJ is None and dx is None:
         _f = J.T @ f
         _M = J.T @ M @ J
     else:
@@ -29,6 +35,45 @@ def pullback(f, M, J, dJ=None, dx= None):
 
 
 
+def pullback_batch(f, M, J, dJdx, out_f, out_M):
+    """K個のRMPのpullbackをまとめて計算して足し込む
+    
+    out_f += Σ J^T (f - M dJdx)，out_M += Σ J^T M J  
+    f : 力 (K, 3)  
+    M : 計量 (K, 3, 3)  
+    J : ヤコビ行列 (K, 3, n)  
+    dJdx : dJ @ dx（曲率項） (K, 3)  
+    out_f, out_M : 足し込む先 (n, 1), (n, n)
+    """
+    
+    n = J.shape[2]
+    g = f - (M @ dJdx[:, :, None])[:, :, 0]
+    J_flat = J.reshape(-1, n)  # (3K, n)
+    out_f[:, 0] += J_flat.T @ g.reshape(-1)
+    out_M += J_flat.T @ (M @ J).reshape(-1, n)
+    return out_f, out_M
+
+
+def obstacle_pairs(K, P, neighbors=None):
+    """制御点と障害物の組の番号 k, p (M,)
+    
+    neighbors : 制御点ごとの近くの障害物の番号のリスト（cKDTree.query_ball_pointの結果）．Noneなら全部の組
+    """
+    if neighbors is None:
+        return np.repeat(np.arange(K), P), np.tile(np.arange(P), K)
+    counts = [len(n) for n in neighbors]
+    k = np.repeat(np.arange(K), counts)
+    p = np.concatenate(neighbors).astype(int) if sum(counts) > 0 else np.zeros(0, dtype=int)
+    return k, p
+
+
+def sum_pairs(z, k, K):
+    """組ごとの値 z (M, ...) を制御点ごとに足す (K, ...)"""
+    out = np.zeros((K,) + z.shape[1:])
+    np.add.at(out, k, z)
+    return out
+
+
 ## マニピュレータの論文[R1]のやつ
 def soft_normal(v, alpha):
     """ソフト正規化関数"""
@@ -36,6 +81,12 @@ def soft_normal(v, alpha):
     softmax = v_norm + 1 / alpha * np.log(1 + np.exp(-2 * alpha * v_norm))
     return v / softmax
 
+def soft_normal_batch(v, alpha):
+    """ソフト正規化関数を行ごとに (K, 3)"""
+    v_norm = np.linalg.norm(v, axis=1, keepdims=True)
+    softmax = v_norm + 1 / alpha * np.log(1 + np.exp(-2 * alpha * v_norm))
+    return v / softmax
+
 def metric_stretch(v, alpha):
     """空間を一方向に伸ばす計量"""
     xi = soft_normal(v, alpha)
@@ -103,6 +154,28 @@ class OriginalRMPAttractor:
         f = M @ a
         return f, M
 
+    def get_natural_batch(self, z, dz, z0, dz0=None):
+        """K個の制御点のform ()を一度に計算
+        
+        z, dz : 制御点の位置，速度 (K, 3)  
+        z0 : 目標の位置 (K, 3) か (1, 3)  
+        戻り値 : f (K, 3), M (K, 3, 3)
+        """
+        
+        damp = self.gain / self.max_speed
+        a = self.gain * soft_normal_batch(z0 - z, self.a_damp_r) - damp * dz
+        
+        dis = np.linalg.norm(z0 - z, axis=1)
+        weight = np.exp(-dis / self.sigma_W)
+        beta_attract = 1 - np.exp(-1 / 2 * (dis / self.sigma_H) ** 2)
+        s = soft_normal_batch(a, self.A_damp_r)
+        H = beta_attract[:, None, None] * s[:, :, None] * s[:, None, :] \
+            + (1 - beta_attract)[:, None, None] * np.eye(3)
+        M = weight[:, None, None] * H
+        
+        f = (M @ a[:, :, None])[:, :, 0]
+        return f, M
+
 
 
 class OriginalRMPCollisionAvoidance:
@@ -116,6 +189,8 @@ class OriginalRMPCollisionAvoidance:
         self.rep_gain = kwargs.pop('rep_gain')
         # 障害物計量
         self.obs_r = kwargs.pop('obs_r')
+        # 障害物を探す半径．Noneなら全部の障害物
+        self.cutoff_radius = kwargs.pop('cutoff_radius', None)
 
     def _a(self, z, dz, z0):
         """障害物加速度"""
@@ -165,6 +240,37 @@ class OriginalRMPCollisionAvoidance:
         f = M @ a
         return f, M
 
+    def get_natural_batch(self, z, dz, z0, dz0=None, neighbors=None):
+        """K個の制御点とP個の障害物のform ()を一度に計算して障害物について足す
+        
+        z, dz : 制御点の位置，速度 (K, 3)  
+        z0 : 障害物の位置 (P, 3)  
+        dz0 : 使わない（get_naturalに合わせた引数）  
+        neighbors : 制御点ごとの近くの障害物の番号のリスト．Noneなら全部の組  
+        戻り値 : f (K, 3), M (K, 3, 3)
+        """
+        
+        K = len(z)
+        k, p = obstacle_pairs(K, len(z0), neighbors)
+        dz = dz[k]
+        x = z[k] - z0[p]  # (M, 3)
+        dis = np.linalg.norm(x, axis=1)
+        dis_grad = x / dis[:, None]
+        
+        # 加速度（_aと同じ）
+        alpha_rep = self.rep_gain * np.exp(-dis / self.scale_rep)
+        v = np.einsum('mi,mi->m', dis_grad, dz)  # 障害物から離れる向きの速さ
+        alpha_damp = self.rep_gain * self.ratio / (dis / self.scale_damp + 1e-7)
+        a = (alpha_rep + alpha_damp * np.maximum(0, -v) * v)[:, None] * dis_grad
+        
+        # 計量（_metricと同じ）
+        r = self.obs_r
+        weight_obs = (dis / r) ** 2 - 2 * dis / r + 1
+        
+        f = sum_pairs(weight_obs[:, None] * a, k, K)
+        M = sum_pairs(weight_obs, k, K)[:, None, None] * np.eye(3)
+        return f, M
+
 
 
 class OriginalRMPJointLimitAvoidance:
@@ -249,36 +355,31 @@ class RMPfromGDSAttractor:
         self.alpha = kwargs.pop('alpha')
         self.epsilon = kwargs.pop('epsilon')
 
-    def _inertia_matrix(self, x, dx, x0, dx0):
-        """アトラクター慣性行列"""
-        z = x0 - x
-        dz = dx0 - dx
-        M = rmp_fromGDS_attract_xi_M.attract_M(
+    def _inertia_matrix(self, z):
+        """アトラクター慣性行列 (K, 3, 3)"""
+        return rmp_fromGDS_attract_xi_M.attract_M_batch(
             z, 
-            dz, 
+            None, 
             self.sigma_alpha, 
             self.sigma_gamma, 
             self.w_u, 
             self.w_l, 
             self.alpha, 
             self.epsilon)
-        return M
     
-    def _f(self, x, dx, x0, dx0, M_attract):
-        """アトラクト力（加速度？）"""
+    def _f(self, z, dz, M_attract):
+        """アトラクト力（加速度？） (K, 3)"""
         # パラメーター
         gamma_p = self.gain
         gamma_d = self.gain / self.max_speed
         alpha = self.alpha_f
-        # 変数変換
-        z = x0 - x
-        dz = dx0 - dx
         
         # メイン
-        f1 = -gamma_p * soft_normal(z, alpha) - gamma_d * dz
-        xi_M = rmp_fromGDS_attract_xi_M.attract_xi_M(
-            z, 
-            dz, 
+        f1 = -gamma_p * soft_normal_batch(z, alpha) - gamma_d * dz
+        # ξはjl/rmp.jlと同じく x - x0 で微分したもの（z = x0 - x ではξの符号が逆になる）
+        xi_M = rmp_fromGDS_attract_xi_M.attract_xi_M_batch(
+            -z, 
+            -dz, 
             self.sigma_alpha, 
             self.sigma_gamma, 
             self.w_u, 
@@ -286,15 +387,34 @@ class RMPfromGDSAttractor:
             self.alpha, 
             self.epsilon
         )
-        carv = -np.linalg.inv(M_attract) @ xi_M
+        carv = -np.linalg.solve(M_attract, xi_M[:, :, None])[:, :, 0]
         f = f1 + carv
         return f
 
     def get_natural(self, x, dx, x0, dx0):
-        """form ()"""
+        """form ()
+        
+        x, dx, x0, dx0 : (3, 1)  
+        get_natural_batchを1組で呼ぶ
+        """
+        
+        f, M = self.get_natural_batch(x.T, dx.T, x0.T, np.reshape(dx0, (1, 3)))
+        return f.T, M[0]
+
+    def get_natural_batch(self, x, dx, x0, dx0=None):
+        """K個の制御点のform ()を一度に計算
+        
+        x, dx : 制御点の位置，速度 (K, 3)  
+        x0 : 目標の位置 (K, 3) か (1, 3)  
+        dx0 : 目標の速度 (K, 3) か (1, 3)．Noneなら0  
+        戻り値 : f (K, 3), M (K, 3, 3)
+        """
         
-        M = self._inertia_matrix(x, dx, x0, dx0)
-        f = self._f(x, dx, x0, dx0, M)
+        z = x0 - x
+        dz = -dx if dx0 is None else dx0 - dx
+        
+        M = self._inertia_matrix(z)
+        f = self._f(z, dz, M)
         
         return f, M
 
@@ -308,6 +428,8 @@ class RMPfromGDSCollisionAvoidance:
         self.rw = kwargs.pop('rw')
         self.sigma = kwargs.pop('sigma')
         self.alpha = kwargs.pop('alpha')
+        # 障害物を探す半径．Noneなら全部の障害物（rwくらいにすると速い）
+        self.cutoff_radius = kwargs.pop('cutoff_radius', None)
 
     def _w(self, s):
         """重み関数"""
@@ -328,19 +450,11 @@ class RMPfromGDSCollisionAvoidance:
         return -4*s**-5
     
     def _u(self, ds):
-        """速度依存計量の速度依存部分"""
-        if ds < 0:
-            return 1 - np.exp(-ds**2 / (2 * self.sigma**2))
-            #return 0
-        else:
-            return 0
+        """速度依存計量の速度依存部分（配列可）"""
+        return np.where(ds < 0, 1 - np.exp(-ds**2 / (2 * self.sigma**2)), 0)
     
     def _dudsdot(self, ds,):
-        if ds < 0:
-            return -np.exp(-ds**2 / (2 * self.sigma**2)) * (-ds / self.sigma**2)
-            #return 0
-        else:
-            return 0
+        return np.where(ds < 0, -np.exp(-ds**2 / (2 * self.sigma**2)) * (-ds / self.sigma**2), 0)
     
     def _delta(self, s, ds,):
         return self._u(ds) + 1/2 * ds * self._dudsdot(ds)
@@ -371,28 +485,47 @@ class RMPfromGDSCollisionAvoidance:
     def get_natural(self, x, dx, x0, dx0):
         """form ()
         
-        ・RMP-treeを実装後には直す
+        x, dx, x0, dx0 : (3, 1)  
+        get_natural_batchを1組で呼ぶ
         """
         
-        S = (x0 - x) 
-        V = (dx0 - dx)
-        s = np.linalg.norm(S)
-        ds = 1/s * (S.T @ V)
+        f, M = self.get_natural_batch(x.T, dx.T, x0.T, np.reshape(dx0, (1, 3)))
+        return f.T, M[0]
+
+    def get_natural_batch(self, x, dx, x0, dx0=None, neighbors=None):
+        """K個の制御点とP個の障害物のform ()を一度に計算して障害物について足す
+        
+        距離 s = |x0 - x| の1次元のRMPを J = ds/dx = -(x0 - x)^T / s で引き戻す  
+        x, dx : 制御点の位置，速度 (K, 3)  
+        x0 : 障害物の位置 (P, 3)  
+        dx0 : 障害物の速度 (P, 3) か (1, 3)．Noneなら0  
+        neighbors : 制御点ごとの近くの障害物の番号のリスト．Noneなら全部の組  
+        戻り値 : f (K, 3), M (K, 3, 3)
+        """
+        
+        K = len(x)
+        k, p = obstacle_pairs(K, len(x0), neighbors)
+        dx = dx[k]
+        S = x0[p] - x[k]  # (M, 3)
+        if dx0 is None:
+            V = -dx
+        elif len(dx0) == 1:
+            V = dx0 - dx
+        else:
+            V = dx0[p] - dx
+        s = np.linalg.norm(S, axis=1)
+        ds = np.einsum('mi,mi->m', S, V) / s
         
         m = self._inertia(s, ds)
         f = self._f(s, ds,)
         
-        J = -(x - dx).T / s
-        dJ = -1 / s**2 * ((dx0 - dx).T - (x0 - dx).T*ds)
-        
-        f = J.T * (f - m * dJ @ dx)
-        M = J.T @ m @ J
+        J = -S / s[:, None]
+        dJ = -(V * s[:, None] - S * ds[:, None]) / s[:, None]**2
+        dJdx = np.einsum('mi,mi->m', dJ, dx)
         
-        # f = J.T * f
-        # M = J.T @ m @ J
+        f = sum_pairs(J * (f - m * dJdx)[:, None], k, K)
+        M = sum_pairs(m[:, None, None] * J[:, :, None] * J[:, None, :], k, K)
         
-        # print('f = ', f)
-        # print('M = ', M)
         return f, M
 
 
@@ -464,5 +597,142 @@ class RMPfromGDSJointLimitAvoidance:
 
 
 
+def _test():
+    import time
+    from scipy.spatial import cKDTree
+    
+    rng = np.random.default_rng(0)
+    K, P = 9, 500
+    x = rng.normal(size=(K, 3))
+    dx = rng.normal(size=(K, 3))
+    x0 = rng.normal(size=(P, 3)) + 3
+    dx0 = np.zeros((1, 3))
+    
+    for name, leaf in (
+        ('Original', OriginalRMPCollisionAvoidance(
+            scale_rep=0.2, scale_damp=1, ratio=0.5, rep_gain=0.3, obs_r=15,
+        )),
+        ('fromGDS', RMPfromGDSCollisionAvoidance(rw=0.5, sigma=1.0, alpha=0.01)),
+    ):
+        start = time.time()
+        f_loop = np.zeros((K, 3))
+        M_loop = np.zeros((K, 3, 3))
+        for k in range(K):
+            for o in x0:
+                f, M = leaf.get_natural(x[k:k+1].T, dx[k:k+1].T, o[:, None], dx0.T)
+                f_loop[k] += np.ravel(f)
+                M_loop[k] += M
+        t_loop = time.time() - start
+        
+        start = time.time()
+        f_batch, M_batch = leaf.get_natural_batch(x, dx, x0, dx0)
+        t_batch = time.time() - start
+        
+        err = max(
+            np.abs(f_batch - f_loop).max() / np.abs(f_loop).max(),
+            np.abs(M_batch - M_loop).max() / np.abs(M_loop).max(),
+        )
+        print(name, " ループとの相対誤差 ", err, " 計算時間 ", t_loop, t_batch)
+        assert err < 1e-6  # Originalの計量はfloat32
+        
+        # 近くの障害物だけ（半径内の組だけのループと比べる）
+        tree = cKDTree(x0)
+        r = 3.0
+        neighbors = tree.query_ball_point(x, r)
+        f_near, M_near = leaf.get_natural_batch(x, dx, x0, dx0, neighbors)
+        f_loop = np.zeros((K, 3))
+        for k in range(K):
+            for o in x0[np.linalg.norm(x0 - x[k], axis=1) <= r]:
+                f_loop[k] += np.ravel(leaf.get_natural(x[k:k+1].T, dx[k:k+1].T, o[:, None], dx0.T)[0])
+        err = np.abs(f_near - f_loop).max() / np.abs(f_loop).max()
+        print(name, " 半径", r, "内の障害物", sum(map(len, neighbors)), "組 ループとの相対誤差 ", err)
+        assert err < 1e-6
+    
+    # まとめたpullbackと1つずつのpullbackの和
+    K = 31
+    f = rng.normal(size=(K, 3))
+    A = rng.normal(size=(K, 3, 3))
+    M = A @ A.transpose(0, 2, 1)
+    J = rng.normal(size=(K, 3, 7))
+    dJdx = rng.normal(size=(K, 3))
+    pulled_f, pulled_M = pullback_batch(f, M, J, dJdx, np.zeros((7, 1)), np.zeros((7, 7)))
+    loop = [pullback(f[k][:, None], M[k], J[k], dJdx=dJdx[k][:, None]) for k in range(K)]
+    err = max(
+        np.abs(pulled_f - sum(z[0] for z in loop)).max(),
+        np.abs(pulled_M - sum(z[1] for z in loop)).max(),
+    )
+    print("まとめたpullbackの差 ", err)
+    assert err < 1e-10
+    
+    # 距離のヤコビ行列とその時間微分を数値微分と比べる
+    leaf = RMPfromGDSCollisionAvoidance(rw=0.5, sigma=1.0, alpha=0.01)
+    leaf._inertia = lambda s, ds: np.ones_like(s)
+    leaf._f = lambda s, ds: np.zeros_like(s)
+    e = 1e-6
+    x, dx, x0 = x[0:1], dx[0:1], x0[0:1]
+    s = lambda x: np.linalg.norm(x0 - x)
+    J_num = np.array([(s(x + e*d) - s(x - e*d)) / (2*e) for d in np.eye(3)])
+    f, M = leaf.get_natural_batch(x, dx, x0)
+    print("Mとヤコビ行列の差 ", np.abs(M[0] - np.outer(J_num, J_num)).max())
+    # 力0，計量1なら f = -J^T (dJ dx)，dJ dx = dx^T (∂^2 s/∂x^2) dx
+    e = 1e-4
+    H = np.array([
+        [(s(x + e*a + e*b) - s(x + e*a - e*b) - s(x - e*a + e*b) + s(x - e*a - e*b)) / (4*e*e) for b in np.eye(3)]
+        for a in np.eye(3)
+    ])
+    dJdx = dx[0] @ H @ dx[0]
+    print("dJ dxの差 ", np.abs(f[0] + J_num * dJdx).max())
+    assert np.abs(f[0] + J_num * dJdx).max() < 1e-6
+    
+    # アトラクタ：まとめた計算と1つずつ
+    K = 100
+    x = rng.normal(size=(K, 3))
+    dx = rng.normal(size=(K, 3))
+    x0 = rng.normal(size=(1, 3))
+    original = OriginalRMPAttractor(
+        max_speed=2, gain=10, a_damp_r=0.15, sigma_W=1, sigma_H=1, A_damp_r=5,
+    )
+    attractor = RMPfromGDSAttractor(
+        max_speed=8.0, gain=5.0, alpha_f=0.15, sigma_alpha=1.0, sigma_gamma=1.0,
+        w_u=10.0, w_l=0.1, alpha=0.15, epsilon=0.5,
+    )
+    for name, leaf in (('Original', original), ('fromGDS', attractor)):
+        f_batch, M_batch = leaf.get_natural_batch(x, dx, x0)
+        loop = [leaf.get_natural(x[k:k+1].T, dx[k:k+1].T, x0.T, np.zeros((3, 1))) for k in range(K)]
+        err = max(
+            np.abs(f_batch - np.array([np.ravel(z[0]) for z in loop])).max(),
+            np.abs(M_batch - np.array([z[1] for z in loop])).max(),
+        )
+        print(name, "アトラクタ ループとの差 ", err)
+        assert err < 1e-10
+    
+    # 曲率項をjl/rmp.jlのξ（ForwardDiffで微分）と同じ計算で求めた値と比べる
+    # (x - x0, dx, ξ)．パラメータは上のattractorと同じ
+    xi_jl = (
+        ([0.3, -0.2, 0.5], [1.0, 0.5, -0.4], [3.7606312073157064, -2.5070874715438034, 6.26771867885951]),
+        ([-0.05, 0.02, 0.01], [-0.3, 0.8, 0.1], [-0.22058795807879386, -0.45104550120933085, 0.012395198413355929]),
+        ([1.2, 0.7, -0.9], [0.2, -1.5, 0.6], [4.868900495000705, -2.7507903481319897, -1.0579206943463215]),
+    )
+    for z, dz, xi_ref in xi_jl:
+        xi = rmp_fromGDS_attract_xi_M.attract_xi_M(
+            np.array([z]).T, np.array([dz]).T, attractor.sigma_alpha, attractor.sigma_gamma,
+            attractor.w_u, attractor.w_l, attractor.alpha, attractor.epsilon,
+        )
+        err = np.abs(np.ravel(xi) - xi_ref).max() / np.abs(xi_ref).max()
+        print("曲率項とjl/rmp.jlの値の相対誤差 ", err)
+        assert err < 1e-12
+    
+    # 目標が止まっているとき，力の曲率の部分は -M^-1 ξ(x - x0, dx)
+    x0 = np.zeros((1, 3))
+    z, dz = np.array([xi_jl[0][0]]), np.array([xi_jl[0][1]])
+    f, M = attractor.get_natural_batch(z, dz, x0)
+    f1 = -attractor.gain * soft_normal_batch(x0 - z, attractor.alpha_f) \
+        - attractor.gain / attractor.max_speed * (-dz)
+    carv = -np.linalg.solve(M[0], xi_jl[0][2])
+    assert np.abs(f[0] - f1[0] - carv).max() < 1e-12
+    
+    return
+
+
 if __name__ == "__main__":
-    print("Hello!!!")
\ No newline at end of file
+    _test()
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""rmp_fromGDS_attract_xi_M.pyを作る
+
+RMP from GDSのアトラクターの慣性行列 G(x) と曲率項
+ξ = (Σ_k ∂G/∂x_k dx_k) dx - 1/2 ∇_x (dx^T G dx)（jl/rmp.jlのξと同じ）
+をsympyで微分し，共通部分式を除去（sympy.cse）してnumpyのコードにする．
+生成した関数は (N, 3) の入力をまとめて計算する．
+
+G(x) = w(x) ((1 - α(x)) s s^T + (α(x) + ε) I)
+s = tanh(alpha |x|) x / |x|，α = exp(-|x|^2 / 2σ_α^2)，w = (w_u - w_l) exp(-|x|^2 / 2σ_γ^2) + w_l
+"""
+
+import numpy as np
+import sympy as sp
+import os
+import time
+
+
+PARAMS = ('sigma_alpha', 'sigma_gamma', 'w_u', 'w_l', 'alpha', 'epsilon')  # 関数の引数の順
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'rmp_fromGDS_attract_xi_M.py'
+)
+
+
+def derive():
+    """G (3,3) とξ (3,) の式"""
+
+    x = sp.symbols('x0:3', real=True)
+    dx = sp.symbols('dx0:3', real=True)
+    sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon = sp.symbols(PARAMS, positive=True)
+
+    X = sp.Matrix(x)
+    dX = sp.Matrix(dx)
+    r2 = X.dot(X)
+    r = sp.sqrt(r2)
+
+    s = sp.tanh(alpha * r) / r * X
+    a = sp.exp(-r2 / (2 * sigma_alpha**2))
+    w = (w_u - w_l) * sp.exp(-r2 / (2 * sigma_gamma**2)) + w_l
+    G = w * ((1 - a) * s * s.T + (a + epsilon) * sp.eye(3))
+
+    Gdot = sum((G.diff(x[k]) * dx[k] for k in range(3)), sp.zeros(3, 3))
+    energy = (dX.T * G * dX)[0, 0]
+    xi = Gdot * dX - sp.Matrix([energy.diff(x[i]) for i in range(3)]) / 2
+
+    return x, dx, G, xi
+
+
+def _emit(name, doc, x, dx, outputs, out_shape, use_dx):
+    """1つの関数のソース（入力は (N, 3)，出力は (N,) + out_shape）"""
+
+    replacements, reduced = sp.cse(outputs, symbols=sp.numbered_symbols('t'))
+    args = ['x', 'dx'] + list(PARAMS)
+
+    lines = ['def %s(%s):' % (name, ', '.join(args)), '    """%s"""' % doc]
+    lines.append('    x = np.atleast_2d(x)')
+    lines.append('    %s = x[:, 0], x[:, 1], x[:, 2]' % ', '.join(str(v) for v in x))
+    if use_dx:
+        lines.append('    dx = np.atleast_2d(dx)')
+        lines.append('    %s = dx[:, 0], dx[:, 1], dx[:, 2]' % ', '.join(str(v) for v in dx))
+    for t, e in replacements:
+        lines.append('    %s = %s' % (t, sp.pycode(e, fully_qualified_modules=False)))
+
+    lines.append('    z = np.empty((len(x),) + %r)' % (out_shape,))
+    for idx, e in zip(np.ndindex(*out_shape), reduced):
+        lines.append('    z[:, %s] = %s' % (
+            ', '.join(str(i) for i in idx), sp.pycode(e, fully_qualified_modules=False)
+        ))
+    lines.append('    return z')
+
+    return '\n'.join(lines)
+
+
+def generate_source():
+    """rmp_fromGDS_attract_xi_M.pyのソース"""
+
+    x, dx, G, xi = derive()
+    params = ', '.join(PARAMS)
+
+    M_batch = _emit(
+        'attract_M_batch', 'アトラクター慣性行列をまとめて計算 (N, 3, 3)',
+        x, dx, list(G), (3, 3), use_dx=False,
+    )
+    xi_batch = _emit(
+        'attract_xi_M_batch', 'アトラクター力における曲率項をまとめて計算 (N, 3)',
+        x, dx, list(xi), (3,), use_dx=True,
+    )
+
+    return '\n'.join([
+        '"""RMP from GDSのアトラクトにおける慣性行列と曲率項を計算',
+        '',
+        'rmp_fromGDS_attract_codegen.pyで自動生成（編集しないこと）．',
+        '*_batchは x, dx に (N, 3) を受け取る',
+        '"""',
+        'import numpy as np',
+        'from numpy import exp, tanh, sqrt',
+        '',
+        '',
+        M_batch,
+        '',
+        '',
+        xi_batch,
+        '',
+        '',
+        'def attract_M(x, dx, %s):' % params,
+        '    """アトラクター慣性行列を計算（x, dx は (3, 1)）"""',
+        '    return attract_M_batch(np.reshape(x, (1, 3)), None, %s)[0]' % params,
+        '',
+        '',
+        'def attract_xi_M(x, dx, %s):' % params,
+        '    """アトラクター力における曲率項を計算（x, dx は (3, 1)）"""',
+        '    return attract_xi_M_batch(np.reshape(x, (1, 3)), np.reshape(dx, (1, 3)), %s).T' % params,
+        '',
+    ])
+
+
+def _check():
+    """生成したξとGの数値微分から作ったξを比べる"""
+    import importlib
+    import rmp_fromGDS_attract_xi_M as generated
+    importlib.reload(generated)
+
+    rng = np.random.default_rng(0)
+    params = (1.0, 1.0, 10.0, 0.1, 0.15, 0.5)
+    G = lambda x: generated.attract_M_batch(x[None, :], None, *params)[0]
+    e = 1e-6
+    err = 0.0
+    for _ in range(100):
+        x = rng.normal(size=3)
+        dx = rng.normal(size=3)
+        dG = [(G(x + e*d) - G(x - e*d)) / (2*e) for d in np.eye(3)]
+        xi = sum(dG[k] * dx[k] for k in range(3)) @ dx - 1/2 * np.array([dx @ dG[i] @ dx for i in range(3)])
+        err = max(err, np.abs(generated.attract_xi_M_batch(x[None, :], dx[None, :], *params)[0] - xi).max())
+    print("ξと数値微分の差 ", err)
+    assert err < 1e-6
+    return
+
+
+def main(path=DEFAULT_PATH):
+    start = time.time()
+    source = generate_source()
+    with open(path, 'w', encoding='UTF-8') as file:
+        file.write(source)
+    print("生成時間 ", time.time() - start)
+    print(path, len(source), "bytes")
+    if path == DEFAULT_PATH:
+        _check()
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,196 @@
-"""RMP from GDSのアトラクトにおける曲率項を計算"""
+"""RMP from GDSのアトラクトにおける慣性行列と曲率項を計算
+
+rmp_fromGDS_attract_codegen.pyで自動生成（編集しないこと）．
+*_batchは x, dx に (N, 3) を受け取る
+"""
 import numpy as np
-from math import exp, tanh
+from numpy import exp, tanh, sqrt
 
-def attract_M(x, dx, sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon):
-    """アトラクター慣性行列を計算"""
-    x0 = x[0, 0]
-    y0 = x[1, 0]
-    z0 = x[2, 0]
-    x_norm = np.linalg.norm(x)
-    
-    # dx0 = dx[0, 0]
-    # dy0 = dx[1, 0]
-    # dz0 = dx[2, 0]
-    
-    M = np.array([
-        [(w_l*(1 - exp(-(x_norm**2)**1.0/(2*sigma_gamma**2))) + w_u*exp(-(x_norm**2)**1.0/(2*sigma_gamma**2)))*(epsilon + x0**2*(1 - exp(-2*alpha*(x_norm**2)**0.5))**2*(1 - exp(-(x_norm**2)**1.0/(2*sigma_alpha**2)))*(x_norm**2)**(-1.0)/(1 + exp(-2*alpha*(x_norm**2)**0.5))**2 + exp(-(x_norm**2)**1.0/(2*sigma_alpha**2))), -x0*y0*(-w_l*(exp((x_norm**2)**1.0/(2*sigma_gamma**2)) - 1) - w_u)*(exp((x_norm**2)**1.0/(2*sigma_alpha**2)) - 1)*(x_norm**2)**(-1.0)*exp(-(sigma_alpha**2 + sigma_gamma**2)*(x_norm**2)**1.0/(2*sigma_alpha**2*sigma_gamma**2))*tanh(alpha*(x_norm**2)**0.5)**2, -x0*z0*(-w_l*(exp((x_norm**2)**1.0/(2*sigma_gamma**2)) - 1) - w_u)*(exp((x_norm**2)**1.0/(2*sigma_alpha**2)) - 1)*(x_norm**2)**(-1.0)*exp(-(sigma_alpha**2 + sigma_gamma**2)*(x_norm**2)**1.0/(2*sigma_alpha**2*sigma_gamma**2))*tanh(alpha*(x_norm**2)**0.5)**2], 
-        [-x0*y0*(-w_l*(exp((x_norm**2)**1.0/(2*sigma_gamma**2)) - 1) - w_u)*(exp((x_norm**2)**1.0/(2*sigma_alpha**2)) - 1)*(x_norm**2)**(-1.0)*exp(-(sigma_alpha**2 + sigma_gamma**2)*(x_norm**2)**1.0/(2*sigma_alpha**2*sigma_gamma**2))*tanh(alpha*(x_norm**2)**0.5)**2, (w_l*(1 - exp(-(x_norm**2)**1.0/(2*sigma_gamma**2))) + w_u*exp(-(x_norm**2)**1.0/(2*sigma_gamma**2)))*(epsilon + y0**2*(1 - exp(-2*alpha*(x_norm**2)**0.5))**2*(1 - exp(-(x_norm**2)**1.0/(2*sigma_alpha**2)))*(x_norm**2)**(-1.0)/(1 + exp(-2*alpha*(x_norm**2)**0.5))**2 + exp(-(x_norm**2)**1.0/(2*sigma_alpha**2))), -y0*z0*(-w_l*(exp((x_norm**2)**1.0/(2*sigma_gamma**2)) - 1) - w_u)*(exp((x_norm**2)**1.0/(2*sigma_alpha**2)) - 1)*(x_norm**2)**(-1.0)*exp(-(sigma_alpha**2 + sigma_gamma**2)*(x_norm**2)**1.0/(2*sigma_alpha**2*sigma_gamma**2))*tanh(alpha*(x_norm**2)**0.5)**2], 
-        [-x0*z0*(-w_l*(exp((x_norm**2)**1.0/(2*sigma_gamma**2)) - 1) - w_u)*(exp((x_norm**2)**1.0/(2*sigma_alpha**2)) - 1)*(x_norm**2)**(-1.0)*exp(-(sigma_alpha**2 + sigma_gamma**2)*(x_norm**2)**1.0/(2*sigma_alpha**2*sigma_gamma**2))*tanh(alpha*(x_norm**2)**0.5)**2, -y0*z0*(-w_l*(exp((x_norm**2)**1.0/(2*sigma_gamma**2)) - 1) - w_u)*(exp((x_norm**2)**1.0/(2*sigma_alpha**2)) - 1)*(x_norm**2)**(-1.0)*exp(-(sigma_alpha**2 + sigma_gamma**2)*(x_norm**2)**1.0/(2*sigma_alpha**2*sigma_gamma**2))*tanh(alpha*(x_norm**2)**0.5)**2, (w_l*(1 - exp(-(x_norm**2)**1.0/(2*sigma_gamma**2))) + w_u*exp(-(x_norm**2)**1.0/(2*sigma_gamma**2)))*(epsilon + z0**2*(1 - exp(-2*alpha*(x_norm**2)**0.5))**2*(1 - exp(-(x_norm**2)**1.0/(2*sigma_alpha**2)))*(x_norm**2)**(-1.0)/(1 + exp(-2*alpha*(x_norm**2)**0.5))**2 + exp(-(x_norm**2)**1.0/(2*sigma_alpha**2)))]
-        ])
-    
-    return M
 
+def attract_M_batch(x, dx, sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon):
+    """アトラクター慣性行列をまとめて計算 (N, 3, 3)"""
+    x = np.atleast_2d(x)
+    x0, x1, x2 = x[:, 0], x[:, 1], x[:, 2]
+    t0 = x0**2
+    t1 = x1**2
+    t2 = x2**2
+    t3 = t0 + t1 + t2
+    t4 = -1/2*t3
+    t5 = w_l + (-w_l + w_u)*exp(t4/sigma_gamma**2)
+    t6 = exp(t4/sigma_alpha**2)
+    t7 = (1 - t6)*tanh(alpha*sqrt(t3))**2/t3
+    t8 = epsilon + t6
+    t9 = t5*t7*x0
+    t10 = t9*x1
+    t11 = t9*x2
+    t12 = t5*t7*x1*x2
+    z = np.empty((len(x),) + (3, 3))
+    z[:, 0, 0] = t5*(t0*t7 + t8)
+    z[:, 0, 1] = t10
+    z[:, 0, 2] = t11
+    z[:, 1, 0] = t10
+    z[:, 1, 1] = t5*(t1*t7 + t8)
+    z[:, 1, 2] = t12
+    z[:, 2, 0] = t11
+    z[:, 2, 1] = t12
+    z[:, 2, 2] = t5*(t2*t7 + t8)
+    return z
 
 
-def attract_xi_M(x, dx, sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon):
-    """アトラクター力における曲率項を計算"""
-    x0 = x[0, 0]
-    y0 = x[1, 0]
-    z0 = x[2, 0]
-    x_norm = np.linalg.norm(x)
-    
-    dx0 = dx[0, 0]
-    dy0 = dx[1, 0]
-    dz0 = dx[2, 0]
-    
-    #sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon = 1, 1, 1, 1, 1, 1
-    
-    xi_M = np.array([
-        [x_norm**(-61.0)*(dx0*(dx0*x0*(1.0*sigma_alpha**2*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((sigma_alpha**2 + 6*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + sigma_gamma**2*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**1.0*(-4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**5.5 + 4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 + 2.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 2*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + 1.0*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**7.0)*exp((5 + (sigma_alpha**2 + 2*sigma_gamma**2)/sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2)))*x_norm**7.0*exp((2*sigma_alpha**2 + 7*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + (dy0*y0 + dz0*z0)*(1.0*sigma_alpha**2*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((sigma_alpha**2 + 5*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + sigma_gamma**2*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**1.0*(-4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (sigma_alpha**2 + 2*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2))*x_norm**8.0*exp((sigma_alpha**2 + 4*sigma_gamma**2)*x_norm**1.0/(sigma_alpha**2*sigma_gamma**2)))*x_norm**46.0*exp((27*sigma_alpha**2 + 38*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dx0*x_norm**45.0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**14.5*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.5*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dx0*sigma_alpha**2*x0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dx0*sigma_gamma**2*x0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**5.5 + 4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 + 2.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 2*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + 1.0*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**7.0)*exp((5 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2)) + 2.0*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dy0*y0 + dz0*z0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)))*exp((23*sigma_alpha**2 + 39*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - (1 - exp(2*alpha*x_norm**0.5))*(dy0*(dz0*x0*y0*z0*x_norm**8.0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**5.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 - 2.0*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 + 1.0*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0) + (dx0*y0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0) + dy0*x0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0))*x_norm**7.0) + dz0*(dy0*x0*y0*z0*x_norm**8.0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**5.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 - 2.0*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 + 1.0*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0) + (dx0*z0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0) + dz0*x0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0))*x_norm**7.0))*x_norm**46.0*exp((15*sigma_alpha**2 + 26*sigma_gamma**2)*x_norm**1.0/(sigma_alpha**2*sigma_gamma**2)) + (dy0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - dx0*sigma_alpha**2*sigma_gamma**2*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dy0*sigma_alpha**2*x0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 11*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dy0*sigma_gamma**2*x0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2) + 2.0*sigma_alpha**2*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dx0*x0 + dz0*z0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))) + dz0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - dx0*sigma_alpha**2*sigma_gamma**2*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dz0*sigma_alpha**2*x0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 11*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dz0*sigma_gamma**2*x0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2) + 2.0*sigma_alpha**2*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dx0*x0 + dy0*y0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))))*x_norm**46.0*exp((23*sigma_alpha**2 + 40*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)))*exp(-(31*sigma_alpha**2 + 53*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))/(sigma_alpha**2*sigma_gamma**2*(exp(2*alpha*x_norm**0.5) + 1)**3)], 
-        [x_norm**(-61.0)*(dy0*(dy0*y0*(1.0*sigma_alpha**2*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((sigma_alpha**2 + 6*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + sigma_gamma**2*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**1.0*(-4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**5.5 + 4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 + 2.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 2*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + 1.0*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**7.0)*exp((5 + (sigma_alpha**2 + 2*sigma_gamma**2)/sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2)))*x_norm**7.0*exp((2*sigma_alpha**2 + 7*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + (dx0*x0 + dz0*z0)*(1.0*sigma_alpha**2*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((sigma_alpha**2 + 5*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + sigma_gamma**2*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**1.0*(-4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (sigma_alpha**2 + 2*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2))*x_norm**8.0*exp((sigma_alpha**2 + 4*sigma_gamma**2)*x_norm**1.0/(sigma_alpha**2*sigma_gamma**2)))*x_norm**46.0*exp((27*sigma_alpha**2 + 38*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dy0*x_norm**45.0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**14.5*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.5*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dy0*sigma_alpha**2*y0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dy0*sigma_gamma**2*y0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**5.5 + 4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 + 2.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 2*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + 1.0*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**7.0)*exp((5 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2)) + 2.0*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dx0*x0 + dz0*z0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)))*exp((23*sigma_alpha**2 + 39*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - (1 - exp(2*alpha*x_norm**0.5))*(dx0*(dz0*x0*y0*z0*x_norm**8.0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**5.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 - 2.0*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 + 1.0*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0) + (dx0*y0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0) + dy0*x0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0))*x_norm**7.0) + dz0*(dx0*x0*y0*z0*x_norm**8.0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**5.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 - 2.0*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 + 1.0*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0) + (dy0*z0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0) + dz0*y0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0))*x_norm**7.0))*x_norm**46.0*exp((15*sigma_alpha**2 + 26*sigma_gamma**2)*x_norm**1.0/(sigma_alpha**2*sigma_gamma**2)) + (dx0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dx0*sigma_alpha**2*y0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 11*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dx0*sigma_gamma**2*y0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2) - dy0*sigma_alpha**2*sigma_gamma**2*x0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 2.0*sigma_alpha**2*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dy0*y0 + dz0*z0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*x0*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))) + dz0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - dy0*sigma_alpha**2*sigma_gamma**2*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dz0*sigma_alpha**2*y0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 11*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dz0*sigma_gamma**2*y0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2) + 2.0*sigma_alpha**2*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dx0*x0 + dy0*y0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))))*x_norm**46.0*exp((23*sigma_alpha**2 + 40*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)))*exp(-(31*sigma_alpha**2 + 53*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))/(sigma_alpha**2*sigma_gamma**2*(exp(2*alpha*x_norm**0.5) + 1)**3)], 
-        [x_norm**(-61.0)*(dz0*(dz0*z0*(1.0*sigma_alpha**2*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((sigma_alpha**2 + 6*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + sigma_gamma**2*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**1.0*(-4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**5.5 + 4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 + 2.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 2*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + 1.0*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**7.0)*exp((5 + (sigma_alpha**2 + 2*sigma_gamma**2)/sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2)))*x_norm**7.0*exp((2*sigma_alpha**2 + 7*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + (dx0*x0 + dy0*y0)*(1.0*sigma_alpha**2*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((sigma_alpha**2 + 5*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + sigma_gamma**2*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**1.0*(-4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (sigma_alpha**2 + 2*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2))*x_norm**8.0*exp((sigma_alpha**2 + 4*sigma_gamma**2)*x_norm**1.0/(sigma_alpha**2*sigma_gamma**2)))*x_norm**46.0*exp((27*sigma_alpha**2 + 38*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dz0*x_norm**45.0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**14.5*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.5*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dz0*sigma_alpha**2*z0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dz0*sigma_gamma**2*z0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**5.5 + 4.0*alpha*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 + 2.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 2*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + 1.0*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**7.0)*exp((5 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2)) + 2.0*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dx0*x0 + dy0*y0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(dx0*x0 + dy0*y0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**15.0*exp((7*sigma_alpha**2 + 13*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)))*exp((23*sigma_alpha**2 + 39*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - (1 - exp(2*alpha*x_norm**0.5))*(dx0*(dy0*x0*y0*z0*x_norm**8.0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**5.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 - 2.0*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 + 1.0*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0) + (dx0*z0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0) + dz0*x0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0))*x_norm**7.0) + dy0*(dx0*x0*y0*z0*x_norm**8.0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**5.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.5 - 2.0*sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 + 1.0*sigma_alpha**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 - 1.0*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0) + (dy0*z0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0) + dz0*y0*(4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**6.5 - 4.0*alpha*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.5 - 2.0*sigma_alpha**2*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**6.0 + sigma_alpha**2*sigma_gamma**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 + 1.0*sigma_alpha**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0 - 1.0*sigma_gamma**2*z0**2*(1 - exp(2*alpha*x_norm**0.5))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**7.0))*x_norm**7.0))*x_norm**46.0*exp((15*sigma_alpha**2 + 26*sigma_gamma**2)*x_norm**1.0/(sigma_alpha**2*sigma_gamma**2)) + (dx0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dx0*sigma_alpha**2*z0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 11*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dx0*sigma_gamma**2*z0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*x0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2) - dz0*sigma_alpha**2*sigma_gamma**2*x0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 2.0*sigma_alpha**2*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dy0*y0 + dz0*z0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*x0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(dy0*y0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))) + dy0*(-4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 4.0*alpha*sigma_alpha**2*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.5*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*dy0*sigma_alpha**2*z0*(w_l - w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*(epsilon*(exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/sigma_alpha**2) - y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*exp(x_norm**1.0/(2*sigma_alpha**2)) + (exp(2*alpha*x_norm**0.5) + 1)**2*x_norm**1.0*exp(x_norm**1.0/(2*sigma_alpha**2)))*exp((7*sigma_alpha**2 + 11*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + dy0*sigma_gamma**2*z0*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*x_norm**9.0*(-4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*x_norm**4.5 + 4.0*alpha*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.5 + 2.0*sigma_alpha**2*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**4.0 + 1.0*y0**2*(1 - exp(2*alpha*x_norm**0.5))**2*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**5.0 - 1.0*(exp(2*alpha*x_norm**0.5) + 1)**3*x_norm**6.0)*exp((2 + (7*sigma_alpha**2 + 8*sigma_gamma**2)/(2*sigma_gamma**2))*x_norm**1.0/sigma_alpha**2) - dz0*sigma_alpha**2*sigma_gamma**2*y0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 2.0*sigma_alpha**2*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**13.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) - 1.0*sigma_alpha**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(1 - exp(x_norm**1.0/(2*sigma_alpha**2)))*(w_l - w_u)*(dx0*x0 + dz0*z0)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)) + 1.0*sigma_gamma**2*y0*z0*(1 - exp(2*alpha*x_norm**0.5))**2*(dx0*x0 + dz0*z0)*(-w_l*(1 - exp(x_norm**1.0/(2*sigma_gamma**2))) + w_u)*(exp(2*alpha*x_norm**0.5) + 1)*x_norm**14.0*exp((7*sigma_alpha**2 + 12*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))))*x_norm**46.0*exp((23*sigma_alpha**2 + 40*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2)))*exp(-(31*sigma_alpha**2 + 53*sigma_gamma**2)*x_norm**1.0/(2*sigma_alpha**2*sigma_gamma**2))/(sigma_alpha**2*sigma_gamma**2*(exp(2*alpha*x_norm**0.5) + 1)**3)]
-        ])
-    
-    return xi_M
+def attract_xi_M_batch(x, dx, sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon):
+    """アトラクター力における曲率項をまとめて計算 (N, 3)"""
+    x = np.atleast_2d(x)
+    x0, x1, x2 = x[:, 0], x[:, 1], x[:, 2]
+    dx = np.atleast_2d(dx)
+    dx0, dx1, dx2 = dx[:, 0], dx[:, 1], dx[:, 2]
+    t0 = x0**2
+    t1 = x1**2
+    t2 = x2**2
+    t3 = t0 + t1 + t2
+    t4 = 1/t3
+    t5 = tanh(alpha*sqrt(t3))
+    t6 = t5**2
+    t7 = sigma_alpha**(-2)
+    t8 = -1/2*t3
+    t9 = exp(t7*t8)
+    t10 = 1 - t9
+    t11 = t10*t6
+    t12 = t11*t4
+    t13 = t0*t12
+    t14 = epsilon + t9
+    t15 = sigma_gamma**(-2)
+    t16 = (-w_l + w_u)*exp(t15*t8)
+    t17 = t15*t16
+    t18 = t17*(t13 + t14)
+    t19 = t18*x1
+    t20 = t16 + w_l
+    t21 = t7*t9
+    t22 = t21*x1
+    t23 = -t22
+    t24 = t4*t6
+    t25 = t0*t24
+    t26 = t22*t25
+    t27 = t11/t3**2
+    t28 = 2*t27
+    t29 = t0*t28
+    t30 = t29*x1
+    t31 = alpha*t10*t5*(1 - t6)/t3**(3/2)
+    t32 = 2*t31
+    t33 = t0*t32
+    t34 = t33*x1
+    t35 = t20*(t23 + t26 - t30 + t34)
+    t36 = t18*x2
+    t37 = t21*x2
+    t38 = -t37
+    t39 = t25*t37
+    t40 = t29*x2
+    t41 = t33*x2
+    t42 = t20*(t38 + t39 - t40 + t41)
+    t43 = t18*x0
+    t44 = t21*x0
+    t45 = -t44
+    t46 = t12*x0
+    t47 = x0**3
+    t48 = t21*t24
+    t49 = 2*t47
+    t50 = t20*(-t27*t49 + t31*t49 + t45 + 2*t46 + t47*t48)
+    t51 = t24*t44
+    t52 = t1*t51
+    t53 = t28*x0
+    t54 = t1*t53
+    t55 = t32*x0
+    t56 = t1*t55
+    t57 = t20*(t45 + t52 - t54 + t56)
+    t58 = t12*t20
+    t59 = t58*x1
+    t60 = t1*t12
+    t61 = t17*(t14 + t60)
+    t62 = t61*x0
+    t63 = t20*t30
+    t64 = t20*t26
+    t65 = t13*t17
+    t66 = t65*x1
+    t67 = t20*t34
+    t68 = x1*x2
+    t69 = t20*t68
+    t70 = t53*t69
+    t71 = t51*t69
+    t72 = t17*t46*t68
+    t73 = t55*t69
+    t74 = -dx2*t70 + dx2*t71 - dx2*t72 + dx2*t73
+    t75 = (1/2)*dx1
+    t76 = t2*t51
+    t77 = t2*t53
+    t78 = t2*t55
+    t79 = t20*(t45 + t76 - t77 + t78)
+    t80 = t58*x2
+    t81 = t12*t2
+    t82 = t17*(t14 + t81)
+    t83 = t82*x0
+    t84 = t20*t40
+    t85 = t20*t39
+    t86 = t65*x2
+    t87 = t20*t41
+    t88 = -dx1*t70 + dx1*t71 - dx1*t72 + dx1*t73
+    t89 = (1/2)*dx2
+    t90 = -t70 + t71 - t72 + t73
+    t91 = t20*t46
+    t92 = t20*t52
+    t93 = t20*t54
+    t94 = t17*x0
+    t95 = t60*t94
+    t96 = t20*t56
+    t97 = dx0*(t59 - t63 + t64 - t66 + t67) + dx1*(t91 + t92 - t93 - t95 + t96) + dx2*t90
+    t98 = t20*t76
+    t99 = t20*t77
+    t100 = t81*t94
+    t101 = t20*t78
+    t102 = dx0*(t80 - t84 + t85 - t86 + t87) + dx1*t90 + dx2*(-t100 + t101 + t91 + t98 - t99)
+    t103 = dx1*t59
+    t104 = dx2*t80
+    t105 = (1/2)*dx0
+    t106 = t61*x2
+    t107 = t1*t24*t37
+    t108 = t1*x2
+    t109 = t108*t28
+    t110 = t108*t32
+    t111 = t20*(t107 - t109 + t110 + t38)
+    t112 = t61*x1
+    t113 = 2*t12
+    t114 = x1**3
+    t115 = t20*(t113*x1 - t114*t28 + t114*t32 + t114*t48 + t23)
+    t116 = t2*t22*t24
+    t117 = t2*x1
+    t118 = t117*t28
+    t119 = t117*t32
+    t120 = t20*(t116 - t118 + t119 + t23)
+    t121 = t82*x1
+    t122 = t109*t20
+    t123 = t107*t20
+    t124 = t17*t60*x2
+    t125 = t110*t20
+    t126 = -dx0*t70 + dx0*t71 - dx0*t72 + dx0*t73
+    t127 = t116*t20
+    t128 = t118*t20
+    t129 = t17*t81*x1
+    t130 = t119*t20
+    t131 = dx0*t90 + dx1*(-t122 + t123 - t124 + t125 + t80) + dx2*(t127 - t128 - t129 + t130 + t59)
+    t132 = dx0*t91
+    t133 = t82*x2
+    t134 = x2**3
+    t135 = t20*(t113*x2 - t134*t28 + t134*t32 + t134*t48 + t38)
+    z = np.empty((len(x),) + (3,))
+    z[:, 0] = dx0*(dx0*(-t43 + t50) + dx1*(-t19 + t35) + dx2*(-t36 + t42)) + dx1*t97 + dx2*t102 - t105*(-dx0*t43 + dx0*t50 - dx1*t63 + dx1*t64 - dx1*t66 + dx1*t67 - dx2*t84 + dx2*t85 - dx2*t86 + dx2*t87 + t103 + t104) - t75*(dx0*t59 - dx0*t63 + dx0*t64 - dx0*t66 + dx0*t67 + dx1*t57 - dx1*t62 + t74) - t89*(dx0*t80 - dx0*t84 + dx0*t85 - dx0*t86 + dx0*t87 + dx2*t79 - dx2*t83 + t88)
+    z[:, 1] = dx0*t97 + dx1*(dx0*(t57 - t62) + dx1*(-t112 + t115) + dx2*(-t106 + t111)) + dx2*t131 - t105*(-dx0*t19 + dx0*t35 + dx1*t91 + dx1*t92 - dx1*t93 - dx1*t95 + dx1*t96 + t74) - t75*(dx0*t92 - dx0*t93 - dx0*t95 + dx0*t96 - dx1*t112 + dx1*t115 - dx2*t122 + dx2*t123 - dx2*t124 + dx2*t125 + t104 + t132) - t89*(-dx1*t122 + dx1*t123 - dx1*t124 + dx1*t125 + dx1*t80 + dx2*t120 - dx2*t121 + t126)
+    z[:, 2] = dx0*t102 + dx1*t131 + dx2*(dx0*(t79 - t83) + dx1*(t120 - t121) + dx2*(-t133 + t135)) - t105*(-dx0*t36 + dx0*t42 - dx2*t100 + dx2*t101 + dx2*t91 + dx2*t98 - dx2*t99 + t88) - t75*(-dx1*t106 + dx1*t111 + dx2*t127 - dx2*t128 - dx2*t129 + dx2*t130 + dx2*t59 + t126) - t89*(-dx0*t100 + dx0*t101 + dx0*t98 - dx0*t99 + dx1*t127 - dx1*t128 - dx1*t129 + dx1*t130 - dx2*t133 + dx2*t135 + t103 + t132)
+    return z
 
 
+def attract_M(x, dx, sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon):
+    """アトラクター慣性行列を計算（x, dx は (3, 1)）"""
+    return attract_M_batch(np.reshape(x, (1, 3)), None, sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon)[0]
+
+
+def attract_xi_M(x, dx, sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon):
+    """アトラクター力における曲率項を計算（x, dx は (3, 1)）"""
+    return attract_xi_M_batch(np.reshape(x, (1, 3)), np.reshape(dx, (1, 3)), sigma_alpha, sigma_gamma, w_u, w_l, alpha, epsilon).T
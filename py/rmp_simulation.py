@@ -8,76 +8,74 @@ import scipy.integrate as integrate
 
 
 
-import tqdm
 import time
 
 import environment
-from kinematics import BaxterRobotArmKinematics
+from kinematics import BaxterRobotArmKinematics, BaxterRobotArmKinematicsInPlace
+import inverse_kinematics
+from newton_euler import NewtonEulerDynamics, TorqueReport
+from lagrange import BaxterDynamics
 import rmp
-
-
-
-class PositinData:
-    def __init__(self,):
-        self.x = []
-        self.y = []
-        self.z = []
-    
-    def add(self, X):
-        self.x.append(X[0, 0])
-        self.y.append(X[1, 0])
-        self.z.append(X[2, 0])
-
-
-class FrameData:
-    def __init__(self, arm):
-        self._get_joint_position(arm)
-        self._get_cpoints_position(arm)
-    
-    
-    def _get_joint_position(self, arm):
-        self.joint_positions_list = PositinData()
-        for o in arm.get_joint_positions():
-            self.joint_positions_list.add(o)
-        return
-    
-    
-    def _get_cpoints_position(self, arm):
-        self.cpoints_potisions_list = []
-        for cpoints in arm.cpoints_x:
-            _cs = PositinData()
-            for c in cpoints:
-                _cs.add(c)
-            self.cpoints_potisions_list.append(_cs)
-        return
+import rmp_tree
 
 
 
 class SimulationData:
+    """シミュレーション結果（全フレーム分をまとめた配列）
     
-    def __init__(self,):
-        self.data = []
-        self.ee = PositinData()
-        self.command = []
-        pass
-    
+    joint_positions : ジョイント位置 (T, 11, 3)
+    cpoints_x : 制御点位置 (T, K, 3)
+    cpoints_link : 制御点が属するリンク番号 (K,)
+    ee : グリッパー位置 (T, 3)
+    """
     
-    def add_data(self, arm, ddq=None):
-        self.data.append(FrameData(arm))
+    def __init__(self, data):
+        """
+        
+        data : calc_all_batchの結果
+        """
+        
+        self.joint_positions = data.joint_positions
+        self.cpoints_x = data.cpoints_x
+        self.cpoints_link = data.cpoints_link
+        self.ee = data.Ts_Wo[:, -1, 0:3, 3]
+        self.command = []
         
-        self.ee.add(arm.Ts_Wo[-1].o)
-        if ddq is not None:
-            self.command.append(ddq)
         return
+    
+    
+    def cpoints_in_link(self, i, link):
+        """フレームiでリンクlinkに属する制御点位置 (n, 3)"""
+        return self.cpoints_x[i, self.cpoints_link == link]
 
 
 class Simulator:
     """"""
     
-    def __init__(self, isLeft, TIME_SPAN, TIME_INTERVAL):
+    def __init__(
+        self, isLeft, TIME_SPAN, TIME_INTERVAL,
+        isWithMass=False, isTorqueLimited=True, plant_parameters=None, isCheckGoal=False,
+    ):
+        """
+        
+        isWithMass : Trueならrmpのddqを計算トルク法でトルクにして，
+            順動力学で腕を動かす．Falseならddqをそのまま加速度とする．
+            モデルが実機（plant）と同じでトルク制限もなければ
+            計算トルク法と順動力学は打ち消し合い，Falseと丸め誤差しか変わらない
+        isTorqueLimited : isWithMassのとき，トルクをBaxterDynamics.tau_maxで飽和させる
+        plant_parameters : isWithMassのとき，腕（順動力学）の慣性パラメータのyaml
+            （identification.save_parameters）．Noneなら制御器のモデルと同じ
+        isCheckGoal : Trueならset_environmentで目標に手先が届くかを逆運動学で確認し，
+            届かない時刻があればValueError
+        """
+        
         self.isLeft = isLeft
         self.TIME_SPAN = TIME_SPAN
         self.TIME_INTERVAL = TIME_INTERVAL
+        self.isWithMass = isWithMass
+        self.isTorqueLimited = isTorqueLimited
+        self.plant_parameters = plant_parameters
+        self.isCheckGoal = isCheckGoal
         
         return
     
@@ -152,9 +150,22 @@ class Simulator:
         
         self.gl_goal = environment.Goal(**goal_param).goal
         #self.gl_goal = np.array([[0.3, -0.75, 1]]).T
+        if self.isCheckGoal:
+            reachable = self.check_goal_reachable()
+            if not reachable.all():
+                t = np.arange(0.0, self.TIME_SPAN, self.TIME_INTERVAL)
+                raise ValueError(
+                    '目標に届かない時刻があります t = {} ~ {} ({} / {})'.format(
+                        t[~reachable][0], t[~reachable][-1], (~reachable).sum(), len(t)
+                    )
+                )
         self.obs = environment.set_obstacle(obs_param)
         if self.obs is not None:
             self.obs_plot = np.concatenate(self.obs, axis=1)
+            self.obs_x = self.obs_plot.T  # 障害物の位置 (P, 3)
+            self.obstacles = rmp_tree.ObstacleSet(self.obs_x)  # 近くの障害物を探すKD-tree付き
+        else:
+            self.obstacles = None
         
         print('セット完了')
         print('セット時間 = ', time.time() - start, '\n')
@@ -163,13 +174,60 @@ class Simulator:
     
     
     
+    def check_goal_reachable(self,):
+        """シミュレーション中の目標位置に手先が届くかを逆運動学で確認
+        
+        戻り値 : 時刻ごとに届くか否か (T,)
+        """
+        
+        t = np.arange(0.0, self.TIME_SPAN, self.TIME_INTERVAL)
+        goals = np.array([np.ravel(self.gl_goal(_t)) for _t in t])
+        return inverse_kinematics.check_reachable_sequence(
+            BaxterRobotArmKinematics(self.isLeft), goals
+        )
+    
+    
     def run_simulation(self,):
         
         self.dobs = np.zeros((3, 1))
         
         t = np.arange(0.0, self.TIME_SPAN, self.TIME_INTERVAL)
         
-        arm = BaxterRobotArmKinematics(self.isLeft)
+        arm = BaxterRobotArmKinematicsInPlace(self.isLeft)
+        
+        # RMP-tree（葉はset_controllerで作ったrmp）
+        root = rmp_tree.build_tree(
+            arm, self.rmps, self.joint_limit_avoidance_RMP, self.gl_goal, self.obstacles,
+        )
+        
+        def _ddq_rmp(t, q, dq):
+            """RMPの関節角加速度"""
+            root.pushforward(q, dq, t)  # ロボットアームの全情報更新と制御点への写像
+            root.pullback()
+            return root.resolve()
+        
+        if self.isWithMass:
+            # sympyを使うので質量ありのときだけ読み込む
+            from dynamics_codegen import GeneratedDynamics
+            
+            # 生成したコードの動力学（初回だけコード生成で数秒かかる）
+            dynamics = GeneratedDynamics()  # 制御器のモデル
+            if self.plant_parameters is None:
+                plant = dynamics
+            else:
+                import identification
+                plant = GeneratedDynamics(identification.load_parameters(self.plant_parameters))
+            tau_max = np.array([BaxterDynamics.tau_max]).T
+            F = np.zeros((7, 1))  # 外力
+            
+            def _torque(t, q, dq):
+                """腕に加えるトルク（飽和後）と制御器のトルク（飽和前）"""
+                u = dynamics.calc_torque(q, dq, _ddq_rmp(t, q, dq))  # 計算トルク法
+                if self.isTorqueLimited:
+                    return np.clip(u, -tau_max, tau_max), u
+                return u, u
+            
+            self._torque = _torque  # calc_torque_reportで使う
         
 
         def _eom(t, state):
@@ -184,49 +242,11 @@ class Simulator:
             q = np.array([state[0:7]]).T
             dq = np.array([state[7:14]]).T
             
-            arm.update_all(q, dq)  # ロボットアームの全情報更新
-            
-            pulled_f_all = []
-            pulled_M_all = []
-            
-            for i in range(8):
-                _rmp = self.rmps[i]
-                
-                for x, dx, J, dJ, in zip(
-                    arm.cpoints_x[i],
-                    arm.cpoints_dx[i],
-                    arm.Jos_cpoints[i],
-                    arm.Jos_cpoints_diff_by_t[i],
-                ):
-                    
-                    if self.obs is not None and _rmp.collision_avoidance is not None:
-                        for o in self.obs:
-                            f, M = _rmp.collision_avoidance.get_natural(x, dx, o, self.dobs)
-
-                            _pulled_f, _pulled_M = rmp.pullback(f, M, J, dJ, dq)
-                            
-                            pulled_f_all.append(_pulled_f)
-                            pulled_M_all.append(_pulled_M)
-
-                    if _rmp.goal_attractor is not None:
-                        f, M = _rmp.goal_attractor.get_natural(x, dx, self.gl_goal(t), self.dobs)
-                        
-                        _pulled_f, _pulled_M = rmp.pullback(f, M, J, dJ, dq)
-                        
-                        pulled_f_all.append(_pulled_f)
-                        pulled_M_all.append(_pulled_M)
-            
-            pulled_f_all = np.sum(pulled_f_all, axis=0)
-            pulled_M_all = np.sum(pulled_M_all, axis=0)
-            
-            
-            # ジョイント制限
-            if self.joint_limit_avoidance_RMP is not None:
-                f, M = self.joint_limit_avoidance_RMP.get_natural(q, dq, arm.q_max, arm.q_min)
-                pulled_f_all += f
-                pulled_M_all += M
-            
-            ddq = np.linalg.pinv(pulled_M_all) @ pulled_f_all
+            if self.isWithMass:
+                u, _ = _torque(t, q, dq)
+                ddq = plant.calc_real_ddq(u, F, q, dq)
+            else:
+                ddq = _ddq_rmp(t, q, dq)
             
             dstate = np.concatenate([dq, ddq], axis=0)
             dstate = np.ravel(dstate).tolist()
@@ -245,6 +265,7 @@ class Simulator:
             method='RK45',
             #method='LSODA',
             t_eval=t,
+            dense_output=True,
         )
 
         print("シミュレーション実行終了")
@@ -286,31 +307,10 @@ class Simulator:
         # データ作成
         print("データ作成中...")
         start = time.time()
-        self.data = SimulationData()
-        _arm = BaxterRobotArmKinematics(isLeft=True)
-        
-        for i in tqdm.tqdm(range(len(self.sol.t))):
-        #for i in range(len(self.sol.t)):
-            q = np.array([
-                [self.sol.y[0][i]],
-                [self.sol.y[1][i]],
-                [self.sol.y[2][i]],
-                [self.sol.y[3][i]],
-                [self.sol.y[4][i]],
-                [self.sol.y[5][i]],
-                [self.sol.y[6][i]],
-            ])
-            dq = np.array([
-                [self.sol.y[7][i]],
-                [self.sol.y[8][i]],
-                [self.sol.y[9][i]],
-                [self.sol.y[10][i]],
-                [self.sol.y[11][i]],
-                [self.sol.y[12][i]],
-                [self.sol.y[13][i]],
-            ])
-            _arm.update_all(q, dq)
-            self.data.add_data(_arm, ddq=None)
+        # 全フレームまとめて計算
+        self.data = SimulationData(
+            arm.calc_all_batch(self.sol.y[0:7].T, need={'positions'})
+        )
         
         print("データ作成完了")
         print("データ作成時間 = ", time.time() - start)
@@ -327,6 +327,58 @@ class Simulator:
 
 
 
+    def calc_ddq(self,):
+        """関節角加速度 (T, 7) を解の密出力（dense output）の中心差分から計算"""
+        
+        t = self.sol.t
+        h = 1e-4 * self.TIME_INTERVAL
+        t_plus = np.minimum(t + h, self.sol.sol.t_max)
+        t_minus = np.maximum(t - h, self.sol.sol.t_min)
+        ddq = (self.sol.sol(t_plus)[7:14] - self.sol.sol(t_minus)[7:14]) / (t_plus - t_minus)
+        
+        return ddq.T
+    
+    
+    def calc_applied_torque(self,):
+        """質量ありのとき，各時刻で腕に加えたトルク（飽和後）と制御器のトルク（飽和前） (T, 7)"""
+        
+        z = [self._torque(t, y[0:7, None], y[7:14, None]) for t, y in zip(self.sol.t, self.sol.y.T)]
+        applied = np.array([np.ravel(u) for u, _ in z])
+        command = np.array([np.ravel(u) for _, u in z])
+        
+        return applied, command
+    
+    
+    def calc_torque_report(self, dynamics=None):
+        """軌道全体で必要なトルクを計算してトルクの上限と比べる
+        
+        質量ありでdynamicsを与えないときは，腕に実際に加えた（isTorqueLimitedなら飽和させた）
+        トルクをまとめ，飽和したフレームをself.torque_saturated (T, 7) に入れる
+        
+        dynamics : NewtonEulerDynamics．軌道の逆動力学のトルクをまとめる．Noneならバクスターのもの
+        """
+        
+        print("トルク計算中...")
+        start = time.time()
+        if self.isWithMass and dynamics is None:
+            applied, command = self.calc_applied_torque()
+            self.torque_report = TorqueReport(applied, BaxterDynamics.tau_max)
+            self.torque_saturated = applied != command
+        else:
+            if dynamics is None:
+                dynamics = NewtonEulerDynamics()
+            self.torque_report = dynamics.torque_report(
+                self.sol.y[0:7].T, self.sol.y[7:14].T, self.calc_ddq()
+            )
+        print("トルク計算時間 = ", time.time() - start)
+        print(self.torque_report.summary())
+        if self.isWithMass and dynamics is None:
+            print("飽和したフレーム数 ", self.torque_saturated.sum(axis=0))
+        print("")
+        
+        return self.torque_report
+    
+    
     def plot_animation_2(self,):
         """グラフ作成（遅いかも）"""
         
@@ -398,28 +450,26 @@ class Simulator:
                     self.obs_plot[0, :], self.obs_plot[1, :], self.obs_plot[2, :],
                     label = 'obstacle point', marker = '.', color = 'k',)
             
-            d = self.data.data[i]
-            
             # ジョイント位置
+            jp = self.data.joint_positions[i]
             ax.plot(
-                d.joint_positions_list.x,
-                d.joint_positions_list.y,
-                d.joint_positions_list.z,
+                jp[:, 0], jp[:, 1], jp[:, 2],
                 "o-", color = "blue",
             )
             
             # 制御点
-            for p in d.cpoints_potisions_list:
+            for link in range(self.data.cpoints_link.max() + 1):
+                p = self.data.cpoints_in_link(i, link)
                 ax.scatter(
-                    p.x, p.y, p.z,
+                    p[:, 0], p[:, 1], p[:, 2],
                     marker='o'
                 )
             
             # グリッパー
             ax.plot(
-                self.data.ee.x[0:i],
-                self.data.ee.y[0:i],
-                self.data.ee.z[0:i],
+                self.data.ee[0:i, 0],
+                self.data.ee[0:i, 1],
+                self.data.ee[0:i, 2],
                 "-", color = "#ff7f00"
             )
             
@@ -436,7 +486,7 @@ class Simulator:
         ani = anm.FuncAnimation(
             fig = fig_ani,
             func = _update,
-            frames = len(self.data.data),
+            frames = len(self.data.ee),
             #frames = int(self.TIME_SPAN / self.TIME_INTERVAL),
             interval = self.TIME_INTERVAL * 0.001
         )
@@ -503,28 +553,26 @@ class Simulator:
                 self.obs_plot[0, :], self.obs_plot[1, :], self.obs_plot[2, :],
                 label = 'obstacle point', marker = '.', color = 'k',)
         
-        d = self.data.data[i]
-        
         # ジョイント位置
+        jp = self.data.joint_positions[i]
         ax_rezult.plot(
-            d.joint_positions_list.x,
-            d.joint_positions_list.y,
-            d.joint_positions_list.z,
+            jp[:, 0], jp[:, 1], jp[:, 2],
             "o-", color = "blue",
         )
         
         # 制御点
-        for p in d.cpoints_potisions_list:
+        for link in range(self.data.cpoints_link.max() + 1):
+            p = self.data.cpoints_in_link(i, link)
             ax_rezult.scatter(
-                p.x, p.y, p.z,
+                p[:, 0], p[:, 1], p[:, 2],
                 marker='o'
             )
         
         # グリッパー
         ax_rezult.plot(
-            self.data.ee.x[0:i],
-            self.data.ee.y[0:i],
-            self.data.ee.z[0:i],
+            self.data.ee[0:i, 0],
+            self.data.ee[0:i, 1],
+            self.data.ee[0:i, 2],
             "-", color = "#ff7f00"
         )
         
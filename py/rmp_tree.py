@@ -0,0 +1,470 @@
+"""RMP-tree（jl/rmp_tree.jlのpython版）
+
+根（関節空間）の下に全制御点のノードを置き，葉にrmp.pyのRMPをつなぐ．
+
+* pushforward : 親の (x, dx) から子の (x, dx, J, dJ dx) を計算．根でロボットアームの運動学を
+  1回だけ更新し，全制御点のノードはその結果を参照するので，すべての葉で使い回される
+* pullback : 葉から根へ f, M を集める．制御点のものは根でまとめて（rmp.pullback_batch）引き戻す．
+  目標や障害物の葉は全制御点のノード（ControlPointsNode）につないで，受け持つ制御点を
+  get_natural_batchで1回で計算する
+* resolve : 根で ddq = pinv(M) f
+
+ベクトルは rmp.py と同じく縦ベクトル (d, 1)．
+"""
+
+import numpy as np
+import time
+
+import rmp
+
+
+class RMPNode:
+    """RMP-treeのノード（タスク写像 x = psi(x_parent)）
+
+    親の座標でのヤコビ行列 J と dJ dx_parent を持ち，子から集めた f, M を親へ引き戻す
+    """
+
+    def __init__(self, name, parent=None, psi=None, J=None, dJ=None, dim=None):
+        """
+
+        name : 名前
+        parent : 親ノード
+        psi : タスク写像 x_parent -> x (dim, 1)
+        J : ヤコビ行列 x_parent -> (dim, dim_parent)
+        dJ : ヤコビ行列の時間微分 (x_parent, dx_parent) -> (dim, dim_parent)
+        dim : タスク空間の次元．子を持つノードには必要（f, Mを集めるバッファを作る）
+        """
+
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.psi = psi
+        self.J_func = J
+        self.dJ_func = dJ
+
+        self.x = None
+        self.dx = None
+        self.J = None
+        self.dJdx = None
+        if dim is None:
+            self.f = None
+            self.M = None
+        else:
+            self.f = np.zeros((dim, 1))
+            self.M = np.zeros((dim, dim))
+
+        if parent is not None:
+            parent.add_child(self)
+
+        return
+
+
+    def add_child(self, child):
+        if self.f is None:
+            raise ValueError(self.name + ' : 子を持つノードにはdimが必要です')
+        self.children.append(child)
+        return child
+
+
+    @property
+    def root(self):
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node
+
+
+    def pushforward(self,):
+        """自分の (x, dx, J, dJ dx) を計算して子へ"""
+
+        p = self.parent
+        self.x = self.psi(p.x)
+        self.J = self.J_func(p.x)
+        self.dx = self.J @ p.dx
+        self.dJdx = self.dJ_func(p.x, p.dx) @ p.dx
+
+        for child in self.children:
+            child.pushforward()
+
+        return
+
+
+    def pullback(self,):
+        """子から f, M を集めて親へ引き戻す"""
+
+        self.f.fill(0)
+        self.M.fill(0)
+        for child in self.children:
+            child.pullback()
+
+        _f, _M = rmp.pullback(self.f, self.M, self.J, dJdx=self.dJdx)
+        self.parent.f += _f
+        self.parent.M += _M
+
+        return
+
+
+
+class RMPRoot(RMPNode):
+    """根（関節空間）
+
+    pushforwardでロボットアームの運動学を1回だけ更新する．
+    全制御点のノードのf, Mは根の (K, 3), (K, 3, 3) の配列で，pullbackでまとめて引き戻す
+    """
+
+    def __init__(self, arm, name='root'):
+        """
+
+        arm : SerialChainKinematicsInPlace（update_allで制御点の *_stack が更新されるもの）
+        """
+
+        super().__init__(name, dim=arm.dof)
+        self.arm = arm
+        self.t = 0.0
+
+        K = len(arm.r_bars_link)
+        self.f_cpoints = np.zeros((K, 3))
+        self.M_cpoints = np.zeros((K, 3, 3))
+
+        return
+
+
+    def pushforward(self, q, dq, t=0.0):
+        """関節角度，角速度から木全体の (x, dx, J, dJ dx) を更新"""
+
+        self.t = t
+        self.x = q
+        self.dx = dq
+        self.arm.update_all(q, dq)
+
+        for child in self.children:
+            child.pushforward()
+
+        return
+
+
+    def pullback(self,):
+        """木全体の f, M を根に集める"""
+
+        self.f.fill(0)
+        self.M.fill(0)
+        self.f_cpoints.fill(0)
+        self.M_cpoints.fill(0)
+        for child in self.children:
+            child.pullback()
+
+        # 制御点はまとめて引き戻す
+        arm = self.arm
+        rmp.pullback_batch(
+            self.f_cpoints, self.M_cpoints, arm.Jos_cpoints_stack, arm.dJdq_cpoints_stack,
+            self.f, self.M,
+        )
+
+        return
+
+
+    def resolve(self,):
+        """resolve演算 ddq = pinv(M) f"""
+        return np.linalg.pinv(self.M) @ self.f
+
+
+
+class ControlPointsNode(RMPNode):
+    """全制御点をまとめたノード
+
+    x, dx は根で更新した運動学の配列 (K, 3) そのもの．
+    f, M は根の f_cpoints (K, 3), M_cpoints (K, 3, 3) で，根がまとめて引き戻す
+    """
+
+    def __init__(self, parent, name='cpoints'):
+        """
+
+        parent : RMPRoot
+        """
+
+        super().__init__(name, parent)
+        self.f = parent.f_cpoints
+        self.M = parent.M_cpoints
+        return
+
+
+    def pushforward(self,):
+        arm = self.root.arm
+        self.x = arm.cpoints_x_stack
+        self.dx = arm.cpoints_dx_stack
+        self.J = arm.Jos_cpoints_stack
+        self.dJdx = arm.dJdq_cpoints_stack
+        for child in self.children:
+            child.pushforward()
+        return
+
+
+    def pullback(self,):
+        for child in self.children:
+            child.pullback()
+        return
+
+
+
+class RMPLeaf(RMPNode):
+    """葉．親の空間で自然形式 (f, M) を作って親に足す（写像は恒等）"""
+
+    def __init__(self, parent, natural, name=None):
+        """
+
+        natural : (x, dx, leaf) -> (f, M) を返す関数
+        """
+
+        super().__init__(name or 'leaf', parent)
+        self.natural = natural
+        return
+
+
+    def pushforward(self,):
+        return
+
+
+    def pullback(self,):
+        p = self.parent
+        f, M = self.natural(p.x, p.dx, self)
+        p.f += f
+        p.M += M
+        return
+
+
+
+class RMPBatchLeaf(RMPLeaf):
+    """ControlPointsNodeにつなぐ葉．受け持つ制御点の自然形式をまとめて作って親に足す"""
+
+    def __init__(self, parent, ks, natural, name=None):
+        """
+
+        parent : ControlPointsNode
+        ks : 受け持つ制御点の番号 (K',)
+        natural : (x (K', 3), dx (K', 3), leaf) -> (f (K', 3), M (K', 3, 3)) を返す関数
+        """
+
+        super().__init__(parent, natural, name)
+        self.ks = np.asarray(ks, dtype=int)
+        return
+
+
+    def pullback(self,):
+        p = self.parent
+        ks = self.ks
+        f, M = self.natural(p.x[ks], p.dx[ks], self)
+        p.f[ks] += f
+        p.M[ks] += M
+        return
+
+
+
+class GoalAttractorLeaf(RMPBatchLeaf):
+    """目標へのアトラクタ（rmp.OriginalRMPAttractor, rmp.RMPfromGDSAttractor）"""
+
+    def __init__(self, parent, ks, attractor, goal, name='goal_attractor'):
+        """
+
+        goal : 時刻 -> 目標位置 (3, 1)（environment.Goal().goal）
+        """
+
+        self.attractor = attractor
+        self.goal = goal
+        self.dgoal = np.zeros((1, 3))
+        super().__init__(parent, ks, self._natural, name)
+        return
+
+
+    def _natural(self, x, dx, leaf):
+        return self.attractor.get_natural_batch(x, dx, self.goal(self.root.t).T, self.dgoal)
+
+
+
+class ObstacleSet:
+    """障害物の点群と近傍探索用のKD-tree"""
+
+    def __init__(self, x, dx=None):
+        """
+
+        x : 障害物の位置 (P, 3)
+        dx : 障害物の速度 (P, 3) か (1, 3)．Noneなら0
+        """
+
+        from scipy.spatial import cKDTree
+
+        self.x = x
+        self.dx = np.zeros((1, 3)) if dx is None else dx
+        self.tree = cKDTree(x)
+        return
+
+
+    def neighbors(self, x, r):
+        """点 x (K, 3) から半径r以内の障害物の番号のリスト．rがNoneならNone（全部）"""
+        return None if r is None else self.tree.query_ball_point(x, r)
+
+
+
+class CollisionAvoidanceLeaf(RMPBatchLeaf):
+    """障害物回避（rmp.OriginalRMPCollisionAvoidance, rmp.RMPfromGDSCollisionAvoidance）
+
+    受け持つ全制御点と全障害物（cutoff_radius内のもの）の組をget_natural_batchの1回で計算する
+    """
+
+    def __init__(self, parent, ks, avoidance, obstacles, name='collision_avoidance'):
+        """
+
+        obstacles : ObstacleSet
+        """
+
+        self.avoidance = avoidance
+        self.obstacles = obstacles
+        super().__init__(parent, ks, self._natural, name)
+        return
+
+
+    def _natural(self, x, dx, leaf):
+        obs = self.obstacles
+        return self.avoidance.get_natural_batch(
+            x, dx, obs.x, obs.dx,
+            obs.neighbors(x, self.avoidance.cutoff_radius),
+        )
+
+
+
+class JointLimitAvoidanceLeaf(RMPLeaf):
+    """関節制限回避（rmp.OriginalRMPJointLimitAvoidance, rmp.RMPfromGDSJointLimitAvoidance）．親は根"""
+
+    def __init__(self, parent, avoidance, name='joint_limit_avoidance'):
+        self.avoidance = avoidance
+        super().__init__(parent, self._natural, name)
+        return
+
+
+    def _natural(self, q, dq, leaf):
+        arm = self.root.arm
+        return self.avoidance.get_natural(q, dq, arm.q_max, arm.q_min)
+
+
+
+def _group(groups, obj, ks):
+    """rmpの種類とパラメータが同じものの制御点の番号をまとめる"""
+    key = (type(obj), repr(sorted(vars(obj).items())))
+    groups.setdefault(key, (obj, []))[1].append(ks)
+    return
+
+
+
+def build_tree(arm, rmps, joint_limit_avoidance=None, goal=None, obstacles=None):
+    """Simulator.set_controllerの設定からRMP-treeを作る
+
+    arm : SerialChainKinematicsInPlace
+    rmps : リンクごとの rmp.RMP（goal_attractor, collision_avoidance）
+    joint_limit_avoidance : 関節制限回避のRMP
+    goal : 時刻 -> 目標位置 (3, 1)
+    obstacles : ObstacleSet．Noneなら障害物なし
+    戻り値 : RMPRoot
+    """
+
+    root = RMPRoot(arm)
+    cpoints = ControlPointsNode(root)
+
+    # 同じ種類，同じパラメータのrmpを持つリンクの制御点は1つの葉にまとめる
+    goal_groups = {}
+    collision_groups = {}
+    for i, _rmp in enumerate(rmps):
+        ks = np.flatnonzero(arm.r_bars_link == i)
+        if _rmp.goal_attractor is not None and goal is not None:
+            _group(goal_groups, _rmp.goal_attractor, ks)
+        if _rmp.collision_avoidance is not None and obstacles is not None:
+            _group(collision_groups, _rmp.collision_avoidance, ks)
+
+    for attractor, ks in goal_groups.values():
+        GoalAttractorLeaf(cpoints, np.concatenate(ks), attractor, goal)
+    for avoidance, ks in collision_groups.values():
+        CollisionAvoidanceLeaf(cpoints, np.concatenate(ks), avoidance, obstacles)
+
+    if joint_limit_avoidance is not None:
+        JointLimitAvoidanceLeaf(root, joint_limit_avoidance)
+
+    return root
+
+
+
+def _test():
+    from kinematics import BaxterRobotArmKinematicsInPlace
+
+    arm = BaxterRobotArmKinematicsInPlace(isLeft=True)
+    rng = np.random.default_rng(0)
+    obstacles = ObstacleSet(rng.normal(size=(50, 3)) * 0.2 + np.array([0.3, -0.5, 1.0]))
+    goal = lambda t: np.array([[0.3, -0.75, 1.0]]).T
+
+    gds = rmp.RMPfromGDSCollisionAvoidance(rw=0.5, sigma=1.0, alpha=1e-6)
+    attractor = rmp.OriginalRMPAttractor(
+        max_speed=2, gain=10, a_damp_r=0.15, sigma_W=1, sigma_H=1, A_damp_r=5,
+    )
+    rmps = [rmp.RMP(None, gds) for _ in range(7)] + [rmp.RMP(attractor, gds)]
+    jl = rmp.OriginalRMPJointLimitAvoidance(gamma_p=0.05, gamma_d=0.1, **{'lambda': 0.7})
+
+    root = build_tree(arm, rmps, jl, goal, obstacles)
+
+    q = arm.q_neutral + rng.normal(scale=0.1, size=(7, 1))
+    dq = rng.normal(scale=0.1, size=(7, 1))
+
+    start = time.time()
+    for _ in range(100):
+        root.pushforward(q, dq)
+        root.pullback()
+        ddq = root.resolve()
+    print("1回あたりの計算時間 ", (time.time() - start) / 100)
+
+    # 葉を1つずつ引き戻して足したものと比べる
+    arm.update_all(q, dq)
+    f_all = np.zeros((7, 1))
+    M_all = np.zeros((7, 7))
+    for k in range(len(arm.r_bars_link)):
+        x = arm.cpoints_x_stack[k, :, None]
+        dx = arm.cpoints_dx_stack[k, :, None]
+        J = arm.Jos_cpoints_stack[k]
+        dJdx = arm.dJdq_cpoints_stack[k, :, None]
+        leaves = [gds.get_natural(x, dx, o[:, None], np.zeros((3, 1))) for o in obstacles.x]
+        if arm.r_bars_link[k] == 7:
+            leaves.append(attractor.get_natural(x, dx, goal(0), np.zeros((3, 1))))
+        for f, M in leaves:
+            _f, _M = rmp.pullback(f, M, J, dJdx=dJdx)
+            f_all += _f
+            M_all += _M
+    f, M = jl.get_natural(q, dq, arm.q_max, arm.q_min)
+    ddq_flat = np.linalg.pinv(M_all + M) @ (f_all + f)
+    err = np.abs(ddq - ddq_flat).max() / np.abs(ddq_flat).max()
+    print("葉ごとに引き戻したものとの相対誤差 ", err)
+    assert err < 1e-8
+
+    # 一般のノード（線形なタスク写像 x = A q）の引き戻し
+    A = rng.normal(size=(3, 7))
+    f_leaf = rng.normal(size=(3, 1))
+    M_leaf = np.diag(rng.uniform(1, 2, 3))
+    root2 = RMPRoot(arm)
+    node = RMPNode(
+        'linear', root2, psi=lambda q: A @ q, J=lambda q: A, dJ=lambda q, dq: np.zeros((3, 7)), dim=3,
+    )
+    RMPLeaf(node, lambda x, dx, leaf: (f_leaf, M_leaf))
+    root2.pushforward(q, dq)
+    root2.pullback()
+    err = max(np.abs(root2.f - A.T @ f_leaf).max(), np.abs(root2.M - A.T @ M_leaf @ A).max())
+    print("一般のノードの引き戻しの差 ", err)
+    assert err < 1e-12
+    assert np.allclose(node.dx, A @ dq)
+
+    # dimのないノードは子を持てない
+    try:
+        RMPNode('no_dim', root2).add_child(RMPLeaf(None, None))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError
+
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -1,17 +1,43 @@
 """メイン"""
 
 import yaml
+import numpy as np
 
 
 import rmp_simulation
+from kinematics import BaxterRobotArmKinematics
+import environment
+import workspace_map
 
 
 
 
-def run(params):
+def check_goal(sim_param, goal_param, map_path):
+    """目標がワークスペースマップ上で届くか確認
+    
+    map_path : workspace_map.build_workspace_mapで作った（sim_paramと同じ腕の）マップ．
+        違う腕のマップならValueError
+    戻り値 : シミュレーション中の目標が全部届くならTrue
+    """
+    
+    wmap = workspace_map.WorkspaceMap(map_path)
+    wmap.check_arm(BaxterRobotArmKinematics(sim_param['isLeft']))  # 反対の腕のマップならValueError
+    goal = environment.Goal(**dict(goal_param)).goal
+    t = np.arange(0.0, sim_param['TIME_SPAN'], sim_param['TIME_INTERVAL'])
+    x = np.array([np.ravel(goal(_t)) for _t in t])
+    
+    reachable = wmap.is_reachable(x)
+    if not reachable.all():
+        print('目標に届きません t = ', t[~reachable][0], '~', t[~reachable][-1])
+    
+    return bool(reachable.all())
+
+
+def run(params, map_path=None):
     """シミュレーションを実行
     
     params : yamlでシミュレーション条件を教えて
+    map_path : ワークスペースマップ．与えると届かない目標ならシミュレーションしない
     """
     
     with open(params, encoding='UTF-8') as file:
@@ -21,11 +47,17 @@ def run(params):
     rmp_param = config['rmp_param']
     env_param = config['env_param']
     
+    if map_path is not None:
+        if not check_goal(sim_param, env_param['goal'], map_path):
+            return
+        sim_param = dict(sim_param, isCheckGoal=False)  # マップで確認済み
+    
     
     simulator = rmp_simulation.Simulator(**sim_param)
     simulator.set_controller(rmp_param)
     simulator.set_environment(env_param)
     simulator.run_simulation()
+    simulator.calc_torque_report()
     simulator.plot_animation_2()
     
     return
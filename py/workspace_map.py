@@ -0,0 +1,199 @@
+"""ワークスペースの到達可能性と可操作度のボクセルマップ
+
+関節空間をq_min~q_maxで一様にサンプリングし，手先位置が入ったボクセルに
+到達回数と最大の可操作度 sqrt(det(J J^T)) を記録する．
+マップは (2, nx, ny, nz) の.npy（[0]が到達回数，[1]が最大可操作度）と
+格子の情報の.yamlに保存し，WorkspaceMapでmemmapとして読んで引く．
+.yamlには作った腕（左右，台座と手先の変換）も保存し，WorkspaceMap.check_armで確かめる．
+"""
+
+import numpy as np
+import yaml
+import os
+import time
+
+from kinematics import BaxterRobotArmKinematics
+from inverse_kinematics import tool_position_and_jacobian
+
+
+def default_bounds(arm):
+    """腕が届きうる範囲を囲む直方体 (lower (3,), upper (3,))"""
+
+    reach = np.sum(np.abs(arm.DH_a) + np.abs(arm.DH_d)) + np.linalg.norm(arm.T_tool[0:3, 3])
+    center = arm.Ts_base_Wo[-1][0:3, 3]
+    return center - reach, center + reach
+
+
+def build_workspace_map(
+    arm, path, resolution=0.05, n_samples=10**6, chunk=20000, bounds=None, seed=0,
+):
+    """ワークスペースマップを作成して保存
+
+    arm : SerialChainKinematics
+    path : 保存先の.npy．格子の情報は拡張子を.yamlにしたファイルに保存
+    resolution : ボクセルの一辺 [m]
+    n_samples : 関節角度のサンプル数
+    chunk : 一度に計算するサンプル数
+    bounds : マップの範囲 (lower, upper)．Noneならdefault_bounds
+    """
+
+    if bounds is None:
+        bounds = default_bounds(arm)
+    lower = np.asarray(bounds[0], dtype=np.float64)
+    upper = np.asarray(bounds[1], dtype=np.float64)
+    shape = tuple(int(s) for s in np.ceil((upper - lower) / resolution).astype(int))
+
+    grid = np.lib.format.open_memmap(
+        path, mode='w+', dtype=np.float32, shape=(2,) + shape
+    )
+    grid[:] = 0
+    count = grid[0].reshape(-1)
+    manipulability = grid[1].reshape(-1)
+
+    rng = np.random.default_rng(seed)
+    q_min = np.ravel(arm.q_min)
+    q_max = np.ravel(arm.q_max)
+
+    for start in range(0, n_samples, chunk):
+        N = min(chunk, n_samples - start)
+        q = rng.uniform(q_min, q_max, (N, arm.dof))
+        x, J = tool_position_and_jacobian(arm, q)
+        w = np.sqrt(np.maximum(np.linalg.det(J @ J.transpose(0, 2, 1)), 0))
+
+        idx = np.floor((x - lower) / resolution).astype(int)
+        inside = np.all((idx >= 0) & (idx < shape), axis=1)
+        flat = np.ravel_multi_index(idx[inside].T, shape)
+
+        count += np.bincount(flat, minlength=count.size).astype(np.float32)
+        np.maximum.at(manipulability, flat, w[inside].astype(np.float32))
+
+    grid.flush()
+
+    info = {
+        'lower' : lower.tolist(),
+        'resolution' : float(resolution),
+        'shape' : list(shape),
+        'n_samples' : int(n_samples),
+        'name' : arm.name,
+        'isLeft' : getattr(arm, 'isLeft', None),
+        'T_base' : [np.asarray(T).tolist() for T in arm.T_base],
+        'T_tool' : np.asarray(arm.T_tool).tolist(),
+    }
+    with open(os.path.splitext(path)[0] + '.yaml', 'w', encoding='UTF-8') as file:
+        yaml.safe_dump(info, file)
+
+    return WorkspaceMap(path)
+
+
+class WorkspaceMap:
+    """保存したワークスペースマップを読んで引く（1点あたりO(1)）"""
+
+    def __init__(self, path):
+        """
+
+        path : build_workspace_mapで保存した.npy
+        """
+
+        with open(os.path.splitext(path)[0] + '.yaml', encoding='UTF-8') as file:
+            info = yaml.safe_load(file.read())
+
+        self.grid = np.load(path, mmap_mode='r')
+        self.count = self.grid[0]  # 到達回数
+        self.manipulability = self.grid[1]  # 最大可操作度
+        self.lower = np.array(info['lower'])
+        self.resolution = info['resolution']
+        self.shape = tuple(info['shape'])
+        self.n_samples = info['n_samples']
+        self.name = info.get('name')
+        self.isLeft = info.get('isLeft')
+        self.T_base = None if 'T_base' not in info else np.array(info['T_base'])
+        self.T_tool = None if 'T_tool' not in info else np.array(info['T_tool'])
+
+        return
+
+
+    def check_arm(self, arm):
+        """マップがこの腕で作ったものか確かめる（違えばValueError）
+
+        左右と台座，手先の変換を比べる
+        """
+
+        if self.T_base is None or self.T_tool is None:
+            raise ValueError('腕の情報がないマップです．build_workspace_mapで作り直してください')
+
+        isLeft = getattr(arm, 'isLeft', None)
+        if self.isLeft is not None and isLeft is not None and self.isLeft != isLeft:
+            raise ValueError('{}の腕のマップです'.format('左' if self.isLeft else '右'))
+
+        T_base = np.array([np.asarray(T) for T in arm.T_base])
+        if (
+            T_base.shape != self.T_base.shape or not np.allclose(T_base, self.T_base)
+            or not np.allclose(arm.T_tool, self.T_tool)
+        ):
+            raise ValueError('台座か手先の変換が違う腕のマップです')
+
+        return
+
+
+    def lookup(self, x):
+        """位置xのボクセルの到達回数と最大可操作度
+
+        x : 位置 (3,) か (N, 3)
+        戻り値 : 到達回数, 最大可操作度．範囲外は0
+        """
+
+        x = np.asarray(x, dtype=np.float64)
+        idx = np.floor((x - self.lower) / self.resolution).astype(int)
+        inside = np.all((idx >= 0) & (idx < self.shape), axis=-1)
+        idx = np.where(inside[..., None], idx, 0)
+
+        i, j, k = np.moveaxis(idx, -1, 0)
+        count = np.where(inside, self.count[i, j, k], 0)
+        manipulability = np.where(inside, self.manipulability[i, j, k], 0)
+
+        return count, manipulability
+
+
+    def is_reachable(self, x, min_manipulability=0.0, min_count=1):
+        """位置xに届き，可操作度がmin_manipulability以上の姿勢があるか否か"""
+
+        count, manipulability = self.lookup(x)
+        return (count >= min_count) & (manipulability >= min_manipulability)
+
+
+
+def main():
+    arm = BaxterRobotArmKinematics(isLeft=True)
+    path = './workspace_map_left.npy'
+
+    start = time.time()
+    wmap = build_workspace_map(arm, path)
+    print("作成時間 ", time.time() - start)
+    print("到達できるボクセル ", int((wmap.count > 0).sum()), "/", wmap.count.size)
+
+    # 作成に使っていない姿勢の手先は届くはず
+    rng = np.random.default_rng(1)
+    q = rng.uniform(np.ravel(arm.q_min), np.ravel(arm.q_max), (1000, arm.dof))
+    x, _ = tool_position_and_jacobian(arm, q)
+    print("サンプル外の姿勢の到達判定 ", wmap.is_reachable(x).mean())
+    print("遠くの点 ", wmap.is_reachable(np.array([3.0, 0.0, 1.0])))
+
+    # 読み直したマップは作った腕と合い，反対の腕とは合わない
+    WorkspaceMap(path).check_arm(arm)
+    try:
+        WorkspaceMap(path).check_arm(BaxterRobotArmKinematics(isLeft=False))
+    except ValueError as e:
+        print("右腕で確かめると ", e)
+    else:
+        raise AssertionError
+
+    start = time.time()
+    for _x in x:
+        wmap.lookup(_x)
+    print("1点あたりの検索時間 ", (time.time() - start) / len(x))
+
+    return
+
+
+if __name__ == "__main__":
+    main()